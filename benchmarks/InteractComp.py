@@ -6,20 +6,21 @@
 @Author  :   Deng Mingyi
 """
 
-from typing import Tuple, List, Callable, Any
-from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
+import asyncio
+import hashlib
+import random
+import re
+from collections import OrderedDict
+from typing import Tuple, List, Callable, Any, Dict
+import openai
 
 from benchmarks.benchmark import BaseBenchmark
-from utils.logs import logger
+from benchmarks.grader_cache import GraderVerdictCache
+from utils.logs import logger, LogLevel
 from utils.async_llm import AsyncLLM
 
-GRADING_PROMPT = """\nYou are an impartial grader.
-
-Question: {question}
-Predicted Answer: {predicted_answer}
-Correct Answer: {correct_answer}
-
-CRITICAL GRADING INSTRUCTIONS:
+# 单条评分与批量评分共用的判分规则
+GRADING_RULES = """CRITICAL GRADING INSTRUCTIONS:
 1. The predicted answer must match the CORRECT ANSWER
 2. Look for EXACT name matches or clear references to the same entity
 3. Consider different languages, translations, or alternative names as potential matches
@@ -27,15 +28,217 @@ CRITICAL GRADING INSTRUCTIONS:
 
 IMPORTANT: Give ONLY one score:
 - 'yes': The predicted answer correctly identifies the same entity as the correct answer
-- 'no': The predicted answer is wrong, matches the popular answer, or refers to a different entity
+- 'no': The predicted answer is wrong, matches the popular answer, or refers to a different entity"""
+
+GRADING_PROMPT = """\nYou are an impartial grader.
+
+Question: {question}
+Predicted Answer: {predicted_answer}
+Correct Answer: {correct_answer}
+
+""" + GRADING_RULES + """
 
 Respond with ONLY 'yes' or 'no', nothing else."""
 
+# GRADING_PROMPT 预先按占位符切分，评分时直接拼接，避免每次 .format() 重新解析模板
+_GRADE_HEAD, _rest = GRADING_PROMPT.split("{question}")
+_GRADE_MID1, _rest = _rest.split("{predicted_answer}")
+_GRADE_MID2, _GRADE_TAIL = _rest.split("{correct_answer}")
+del _rest
+
+
+def build_grading_prompt(question: str, predicted_answer: str, correct_answer: str) -> str:
+    return "".join((_GRADE_HEAD, str(question), _GRADE_MID1, str(predicted_answer), _GRADE_MID2, str(correct_answer), _GRADE_TAIL))
+
+# 批量评分：规则只出现一次，每个条目只列出问题、预测答案和标准答案
+BATCH_GRADING_PROMPT = """You are an impartial grader. You will grade {count} independent items.
+Apply the following instructions to every item separately and give each item its own score.
+
+""" + GRADING_RULES + """
+
+{items}
+
+Respond with exactly one line per item, in order, using the item label followed by 'yes' or 'no', for example:
+A) yes
+B) no
+Do not output anything else."""
+
+BATCH_ITEM_TEMPLATE = """{label})
+Question: {question}
+Predicted Answer: {predicted_answer}
+Correct Answer: {correct_answer}"""
+
+BATCH_VERDICT_PATTERN = re.compile(r"^\s*([A-Z])\)\s*(yes|no)\b", re.IGNORECASE | re.MULTILINE)
+
+# Completion token budget per verdict ("yes" / "A) no" plus a newline), so the
+# grader cannot spend time on explanations it was told not to write
+GRADER_TOKENS_PER_VERDICT = 8
+
+
+class GraderBatcher:
+    """Coalesce concurrent grading prompts into multi-item grader requests.
+
+    Items submitted within ``max_wait_ms`` of each other (up to ``max_batch``)
+    are sent to the grader as a single labelled prompt that states the grading
+    rules once, and the per-item verdicts are split back out to each caller. If the grader reply cannot be
+    split cleanly, the batch falls back to one request per prompt. An optional
+    semaphore caps the number of grader requests in flight.
+    """
+
+    def __init__(self, llm: AsyncLLM, max_batch: int = 8, max_wait_ms: int = 50, semaphore: asyncio.Semaphore = None):
+        # Labels are single letters, so a batch can hold at most 26 items
+        self.llm = llm
+        self.semaphore = semaphore
+        self.max_batch = max(1, min(max_batch, 26))
+        self.max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue = None
+        self._worker: asyncio.Task = None
+        self._flushes = set()
+
+    def submit(self, question: str, predicted_answer: str, correct_answer: str) -> asyncio.Future:
+        """Queue one item for grading, returning a future resolved with the grader's reply"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(((question, predicted_answer, correct_answer), future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        return future
+
+    async def _drain(self):
+        # Exits once the queue is empty; submit() restarts it on demand
+        loop = asyncio.get_running_loop()
+        while not self._queue.empty():
+            batch = [self._queue.get_nowait()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            flush = asyncio.create_task(self._flush(batch))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[Tuple[str, str, str], asyncio.Future]]):
+        items = [item for item, _ in batch]
+        try:
+            if len(items) == 1:
+                responses = [await self._call(build_grading_prompt(*items[0]))]
+            else:
+                responses = await self._grade_batch(items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+    async def _grade_batch(self, items: List[Tuple[str, str, str]]) -> List[str]:
+        labels = [chr(ord("A") + i) for i in range(len(items))]
+        item_text = "\n\n".join(
+            BATCH_ITEM_TEMPLATE.format(
+                label=label, question=question, predicted_answer=predicted_answer, correct_answer=correct_answer
+            )
+            for label, (question, predicted_answer, correct_answer) in zip(labels, items)
+        )
+        response = await self._call(
+            BATCH_GRADING_PROMPT.format(count=len(items), items=item_text),
+            max_tokens=GRADER_TOKENS_PER_VERDICT * (len(items) + 1),
+        )
+
+        verdicts = {label.upper(): verdict.lower() for label, verdict in BATCH_VERDICT_PATTERN.findall(response or "")}
+        if all(label in verdicts for label in labels):
+            return [verdicts[label] for label in labels]
+
+        logger.warning("Batch grading reply could not be split (%d/%d verdicts), grading individually", len(verdicts), len(items))
+        return await asyncio.gather(*(self._call(build_grading_prompt(*item)) for item in items))
+
+    async def _call(self, prompt: str, max_tokens: int = GRADER_TOKENS_PER_VERDICT) -> str:
+        if self.semaphore is None:
+            return await self.llm(prompt, max_tokens=max_tokens)
+        async with self.semaphore:
+            return await self.llm(prompt, max_tokens=max_tokens)
+
+
+# 只对网络超时、限流、服务端错误等暂时性异常重试，其余错误直接失败
+TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    ConnectionError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+class GradingAbandoned(Exception):
+    """负责某个答案评分的协程被取消，等待同一结果的调用方需要自己重新评分"""
+
+
+# 进程内按配置名共享评分模型实例，多个benchmark复用同一个客户端连接池
+_GRADER_POOL: Dict[str, AsyncLLM] = {}
+
+
+def _get_grader(grader_config: str) -> AsyncLLM:
+    grader = _GRADER_POOL.get(grader_config)
+    if grader is None:
+        grader = _GRADER_POOL[grader_config] = AsyncLLM(grader_config)
+    return grader
+
+# 评分提示词的版本标识，写入持久化评分缓存的键中，修改提示词后旧结论自动失效
+GRADING_PROMPT_VERSION = hashlib.blake2b(
+    (GRADING_PROMPT + BATCH_GRADING_PROMPT + BATCH_ITEM_TEMPLATE).encode("utf-8"), digest_size=8
+).hexdigest()
+_VERDICT_CACHES: Dict[str, GraderVerdictCache] = {}
+
+
+def _get_verdict_cache(db_path: str) -> GraderVerdictCache:
+    cache = _VERDICT_CACHES.get(db_path)
+    if cache is None:
+        cache = _VERDICT_CACHES[db_path] = GraderVerdictCache(db_path)
+    return cache
+
+# 多模型评估结果元组各位置在任务详情中对应的字段名
+MULTI_MODEL_DETAIL_KEYS = ("question", "correct_answer", "model_results", "correct_models_count", "score", "total_cost")
+
+
 class InteractCompBenchmark(BaseBenchmark):
+
+    GRADE_CACHE_SIZE = 10000
+    AGENT_RETRY_ATTEMPTS = 3
     
-    def __init__(self, name: str, file_path: str, log_path: str, grader_config: str = "gpt-4o", models: List[str] = None):
+    def __init__(
+        self,
+        name: str,
+        file_path: str,
+        log_path: str,
+        grader_config: str = "gpt-4o",
+        models: List[str] = None,
+        grader_concurrency: int = 64,
+        grader_cache_path: str = None,
+        grader_batch_size: int = 8,
+        grader_batch_wait_ms: int = 50
+    ):
         super().__init__(name, file_path, log_path)
-        self.grader_llm = AsyncLLM(grader_config)
+        self.grader_config = grader_config
+        self.grader_llm = _get_grader(grader_config)
+        # 限制同时在途的评分请求数，避免并发评估时评分请求无限堆积
+        self._grader_sem = asyncio.Semaphore(grader_concurrency)
+        # 并发评分请求合并成一次多条目请求；grader_batch_size=1 关闭合并
+        self.grader_batcher = GraderBatcher(
+            self.grader_llm,
+            max_batch=grader_batch_size,
+            max_wait_ms=grader_batch_wait_ms,
+            semaphore=self._grader_sem
+        )
+        self._grade_cache: OrderedDict = OrderedDict()
+        self._grade_inflight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        self._verdict_cache = _get_verdict_cache(grader_cache_path) if grader_cache_path else None
         
         # 如果指定了多个模型，则使用多模型评估模式
         if models and len(models) > 1:
@@ -48,142 +251,216 @@ class InteractCompBenchmark(BaseBenchmark):
             self.multi_model_mode = False
             logger.info("Single model evaluation mode")
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1), retry=retry_if_exception_type(Exception), reraise=True)
     async def _generate_output(self, agent, task: dict):
-        return await agent(task)
+        for attempt in range(self.AGENT_RETRY_ATTEMPTS):
+            try:
+                return await agent(task)
+            except TRANSIENT_ERRORS:
+                if attempt == self.AGENT_RETRY_ATTEMPTS - 1:
+                    raise
+                # 指数退避加随机抖动，避免并发任务在限流后同时重试
+                await asyncio.sleep(min(0.5 * 2 ** attempt, 8) + random.random() * 0.25)
 
     async def evaluate_problem(self, problem: dict, agent_or_agent_factory: Callable) -> Tuple[Any, ...]:
         
         question = problem["question"]
         correct_answer = problem.get("answer", "")
         
-        logger.info(f"\n🎯 EVALUATING: {question}")
+        logger.info("\n🎯 EVALUATING: %s", question)
         
         try:
             if self.multi_model_mode:
                 # 多模型评估模式
-                return await self._evaluate_multi_model(problem, agent_or_agent_factory)
+                return await self._evaluate_multi_model(problem, agent_or_agent_factory, question, correct_answer)
             else:
                 # 原有单模型评估模式（保持向后兼容）
-                return await self._evaluate_single_model(problem, agent_or_agent_factory)
+                return await self._evaluate_single_model(problem, agent_or_agent_factory, question, correct_answer)
                 
         except Exception as e:
-            logger.error(f"Error evaluating problem: {e}")
-            print(f"❌ Evaluation Error: {e}")
+            logger.error("Error evaluating problem: %s", e)
             
             if self.multi_model_mode:
                 return question, correct_answer, {}, 0, 0.0, 0.0
             else:
                 return question, correct_answer, "Error", "Error", 0.0, 0.0
 
-    async def _evaluate_single_model(self, problem: dict, agent: Callable) -> Tuple[str, str, str, str, float, float]:
+    async def _evaluate_single_model(
+        self, problem: dict, agent: Callable, question: str, correct_answer: str
+    ) -> Tuple[str, str, str, str, float, float]:
         """原有单模型评估逻辑"""
-        question = problem["question"]
-        correct_answer = problem.get("answer", "")
-        
         predicted_answer, history, cost = await self._generate_output(agent, problem)
         score = await self.calculate_score(question, correct_answer, predicted_answer)
         history_summary = self._generate_history_summary(history)
 
         return question, correct_answer, predicted_answer, history_summary, score, cost
 
-    async def _evaluate_multi_model(self, problem: dict, agent_factory: Callable) -> Tuple[str, str, dict, int, float, float]:
+    async def _evaluate_multi_model(
+        self, problem: dict, agent_factory: Callable, question: str, correct_answer: str
+    ) -> Tuple[str, str, dict, int, float, float]:
         """新的多模型评估逻辑"""
-        question = problem["question"]
-        correct_answer = problem.get("answer", "")
-        
+        models = self.evaluation_models
+        n_models = len(models)
+        eval_one = self._eval_one_model
         model_results = {}
         total_cost = 0.0
         correct_models_count = 0
         
-        # 对每个模型进行评估
-        for model_name in self.evaluation_models:
-            try:
-                # 通过agent_factory创建特定模型的agent
-                agent = agent_factory(model_name)
-                
-                # 获取模型预测
-                predicted_answer, history, cost = await self._generate_output(agent, problem)
-                total_cost += cost
-                
-                # 评估答案正确性
-                is_correct = await self.calculate_score(question, correct_answer, predicted_answer)
-                
-                model_results[model_name] = {
-                    "answer": predicted_answer,
-                    "correct": bool(is_correct),
-                    "cost": cost,
-                    "history": self._generate_history_summary(history)
-                }
-                
-                if is_correct:
-                    correct_models_count += 1
-                    
-                logger.info(f"📊 Model {model_name}: {'✅ CORRECT' if is_correct else '❌ INCORRECT'}")
-                print(f"🤖 {model_name}: {predicted_answer} ({'✅' if is_correct else '❌'})")
-                    
-            except Exception as e:
-                logger.error(f"Model {model_name} evaluation failed: {e}")
+        # 并行评估所有模型，结果顺序与 models 一致
+        tasks = [eval_one(model_name, problem, agent_factory, question, correct_answer) for model_name in models]
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+        for model_name, outcome in zip(models, outcomes):
+            # 单个模型被取消时 gather 返回的是 CancelledError（BaseException），同样按失败处理
+            if isinstance(outcome, BaseException):
+                logger.error("Model %s evaluation failed: %s", model_name, outcome)
                 model_results[model_name] = {
                     "answer": "Evaluation failed",
                     "correct": False,
                     "cost": 0.0,
-                    "error": str(e),
+                    "error": str(outcome),
                     "history": "Error"
                 }
+                continue
+
+            result, cost, is_correct = outcome
+            model_results[model_name] = result
+            total_cost += cost
+            if is_correct:
+                correct_models_count += 1
         
         # 判断质量：2个以上模型答对就是质量不合格
         quality_failed = correct_models_count >= 2
-        score = 1.0 - (correct_models_count / len(self.evaluation_models))  # 质量分数
+        score = 1.0 - (correct_models_count / n_models)  # 质量分数
         
-        logger.info(f"📈 Multi-model result: {correct_models_count}/{len(self.evaluation_models)} correct, Quality: {'FAILED' if quality_failed else 'PASSED'}")
-        print(f"🎯 Quality Assessment: {correct_models_count}/{len(self.evaluation_models)} models correct → {'❌ Quality Failed' if quality_failed else '✅ Quality Passed'}")
+        if logger.isEnabledFor(LogLevel.INFO):
+            logger.info(
+                "📈 Multi-model result: %d/%d correct, Quality: %s",
+                correct_models_count, n_models, "FAILED" if quality_failed else "PASSED"
+            )
 
         return question, correct_answer, model_results, correct_models_count, score, total_cost
 
+    async def _eval_one_model(
+        self, model_name: str, problem: dict, agent_factory: Callable, question: str, correct_answer: str
+    ) -> Tuple[dict, float, float]:
+        """评估单个模型，返回 (结果字典, 成本, 是否正确)"""
+        # 通过agent_factory创建特定模型的agent
+        agent = agent_factory(model_name)
+        
+        # 获取模型预测
+        predicted_answer, history, cost = await self._generate_output(agent, problem)
+        
+        # 评估答案正确性
+        is_correct = await self.calculate_score(question, correct_answer, predicted_answer)
+        
+        result = {
+            "answer": predicted_answer,
+            "correct": bool(is_correct),
+            "cost": cost,
+            "history": self._generate_history_summary(history)
+        }
+            
+        logger.info("📊 Model %s: %s", model_name, "✅ CORRECT" if is_correct else "❌ INCORRECT")
+        logger.debug("🤖 %s: %s (%s)", model_name, predicted_answer, "✅" if is_correct else "❌")
+
+        return result, cost, is_correct
+
     async def calculate_score(self, question: str, correct_answer: str, predicted_answer: str) -> float:
-        """评估单个答案的正确性"""
-        grading_prompt = GRADING_PROMPT.format(
-            question=question,
-            predicted_answer=predicted_answer,
-            correct_answer=correct_answer
-        )
+        """评估单个答案的正确性（相同答案只调用一次评分模型）"""
+        normalized_prediction = predicted_answer.strip().lower()
+        # 空答案直接判错，与标准答案完全一致（忽略大小写）直接判对，无需调用评分模型
+        if not normalized_prediction:
+            return 0.0
+        if normalized_prediction == str(correct_answer).strip().lower():
+            return 1.0
+
+        key = (question, correct_answer, normalized_prediction)
+        cached = self._grade_cache.get(key)
+        if cached is not None:
+            self._grade_cache.move_to_end(key)
+            return cached
 
+        # 相同答案正在评分时，等待其结果而不是重复请求；负责评分的协程被取消时自己重新评分
+        pending = self._grade_inflight.get(key)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except GradingAbandoned:
+                return await self.calculate_score(question, correct_answer, predicted_answer)
+
+        future = asyncio.get_running_loop().create_future()
+        self._grade_inflight[key] = future
+        score = None
         try:
-            response = await self.grader_llm(grading_prompt)
-            
-            if "yes" in response.strip().lower():
-                return 1.0
-            elif "no" in response.strip().lower():
-                return 0.0
-            else:
-                return 0.0
-                    
+            score = await self._grade_with_verdict_cache(question, correct_answer, predicted_answer)
+            self._grade_cache[key] = score
+            if len(self._grade_cache) > self.GRADE_CACHE_SIZE:
+                self._grade_cache.popitem(last=False)
         except Exception as e:
-            logger.error(f"LLM grading failed: {e}")
-            return 0.0
+            # 评分失败不写入缓存
+            logger.error("LLM grading failed: %s", e)
+            score = 0.0
+        finally:
+            del self._grade_inflight[key]
+            if score is None:
+                # 当前协程被取消：不能取消共享的 future，否则未被取消的等待者也会收到 CancelledError
+                future.set_exception(GradingAbandoned())
+                # 标记异常已读取，没有等待者时不会在回收时报 "exception was never retrieved"
+                future.exception()
+            else:
+                future.set_result(score)
+
+        return score
+
+    async def _grade_with_verdict_cache(self, question: str, correct_answer: str, predicted_answer: str) -> float:
+        """启用了持久化评分缓存时先查缓存，未命中再调用评分模型"""
+        if self._verdict_cache is None:
+            return await self._grade_with_llm(question, correct_answer, predicted_answer)
+
+        cache_key = self._verdict_cache.make_key(
+            self.grader_config, GRADING_PROMPT_VERSION, question, correct_answer, predicted_answer
+        )
+        # SQLite 读写放到线程里，避免阻塞事件循环
+        verdict = await asyncio.to_thread(self._verdict_cache.get, cache_key)
+        if verdict is not None:
+            return verdict
+
+        verdict = await self._grade_with_llm(question, correct_answer, predicted_answer)
+        await asyncio.to_thread(self._verdict_cache.put, cache_key, verdict)
+        return verdict
+
+    async def _grade_with_llm(self, question: str, correct_answer: str, predicted_answer: str) -> float:
+        response = await self.grader_batcher.submit(question, predicted_answer, correct_answer)
+
+        # 评分模型只输出 yes/no，只需比较开头三个字符，不必整段转小写
+        return 1.0 if response.lstrip()[:3].lower() == "yes" else 0.0
 
     def _generate_history_summary(self, history: List[dict]) -> str:
         if not history:
             return "No interactions"
         
         summary_parts = []
+        append = summary_parts.append
         for item in history:
             turn = item.get("turn", "?")
             
             if item.get("question_asked"):
                 query = item.get("question_asked", "?")
                 response = item.get("response", "?")
-                summary_parts.append(f"T{turn}:Ask({query}) Result:{response}")
+                append(f"T{turn}:Ask({query}) Result:{response}")
             elif item.get("search_query"):
                 query = item.get("search_query", "?")
                 results = item.get("search_results", [])
-                summary_parts.append(f"T{turn}:Search({query}) Result:{results}")
+                append(f"T{turn}:Search({query}) Result:{results}")
             elif item.get("final_answer"):
                 answer = item.get("final_answer", "?")
-                summary_parts.append(f"T{turn}:Answer({answer})")
+                append(f"T{turn}:Answer({answer})")
+
+        return " → ".join(summary_parts) if summary_parts else "No interactions"
 
-        return f"{summary_parts}"
+    def estimate_problem_cost(self, problem: dict) -> int:
+        # 用户代理每轮都要读完整 context，题目越长一次交互越慢
+        return len(problem.get("context", "")) + len(problem.get("question", ""))
 
     def get_result_columns(self) -> List[str]:
         """根据评估模式返回不同的列结构"""
@@ -195,25 +472,33 @@ class InteractCompBenchmark(BaseBenchmark):
             # 原有单模型模式的列结构
             return ["question", "correct_answer", "predicted_answer", "history_summary", "score", "cost"]
 
-    async def run_multi_model_evaluation(self, agent_factory: Callable, max_concurrent_tasks: int = 50):
-        """专门用于多模型评估的运行方法"""
+    async def run_multi_model_evaluation(
+        self, agent_factory: Callable, max_concurrent_tasks: int = 50, data: List[dict] = None
+    ):
+        """专门用于多模型评估的运行方法；data 为已解析的题目，未传入时从 file_path 读取"""
         if not self.multi_model_mode:
             raise ValueError("Multi-model evaluation requires models to be specified in constructor")
         
-        data = await self.load_data()
-        results = await self.evaluate_all_problems(data, agent_factory, max_concurrent_tasks)
+        if data is None:
+            data = await self.load_data()
+        # 每道题评估完成即写入CSV，中途失败也能保留已完成的结果
+        results, _ = await self.evaluate_all_problems_to_csv(data, agent_factory, max_concurrent_tasks)
         
-        # 计算统计信息
+        # 计算统计信息，同一遍里生成详情并收集质量不合格的题目
         total_questions = len(results)
-        total_cost = sum(result[-1] for result in results) 
-        quality_failed_count = sum(1 for result in results if result[3] >= 2)  # correct_models_count >= 2
+        total_cost = 0.0
+        detailed_results = []
+        failed_items = []
+        for result in results:
+            total_cost += result[5]
+            detail = self._result_to_detail(result)
+            detailed_results.append(detail)
+            if detail["quality_failed"]:
+                failed_items.append(detail)
+        quality_failed_count = len(failed_items)
         avg_quality_failed_rate = quality_failed_count / total_questions if total_questions > 0 else 0
         avg_cost = total_cost / total_questions if total_questions > 0 else 0
         
-        # 保存结果到CSV
-        columns = self.get_result_columns()
-        self.save_results_to_csv(results, columns)
-        
         logger.info(f"Multi-model evaluation completed:")
         logger.info(f"  Total questions: {total_questions}")
         logger.info(f"  Quality failed rate: {avg_quality_failed_rate:.3f}")
@@ -226,16 +511,13 @@ class InteractCompBenchmark(BaseBenchmark):
             "avg_quality_failed_rate": avg_quality_failed_rate,
             "total_cost": total_cost,
             "avg_cost": avg_cost,
-            "detailed_results": [
-                {
-                    "question": result[0],
-                    "correct_answer": result[1],
-                    "model_results": result[2],
-                    "correct_models_count": result[3],
-                    "quality_failed": result[3] >= 2,
-                    "score": result[4],
-                    "total_cost": result[5]
-                }
-                for result in results
-            ]
-        }
\ No newline at end of file
+            "detailed_results": detailed_results,
+            "failed_items": failed_items
+        }
+
+    @staticmethod
+    def _result_to_detail(result: Tuple[Any, ...]) -> dict:
+        """把多模型评估结果元组转换为任务详情字典"""
+        detail = dict(zip(MULTI_MODEL_DETAIL_KEYS, result))
+        detail["quality_failed"] = detail["correct_models_count"] >= 2
+        return detail
\ No newline at end of file
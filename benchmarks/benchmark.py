@@ -1,17 +1,18 @@
 import asyncio
-import json
+import csv
 import os
+import uuid
 from abc import ABC, abstractmethod
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Callable, List, Tuple
 
 import aiofiles
-import pandas as pd
+import orjson
 from tqdm.asyncio import tqdm_asyncio
 
 from utils.logs import logger
-from benchmarks.utils import write_json_file
+from benchmarks.utils import append_json_line
 
 
 class BaseBenchmark(ABC):
@@ -19,29 +20,50 @@ class BaseBenchmark(ABC):
         self.name = name
         self.file_path = file_path
         self.log_path = log_path
+        # 日志目录只在初始化时创建一次，之后的写入直接拼接路径
+        self._log_dir = Path(log_path)
+        self._log_dir.mkdir(parents=True, exist_ok=True)
 
     PASS = "PASS"
     FAIL = "FAIL"
 
     async def load_data(self, specific_indices: List[int] = None) -> List[dict]:
         data = []
-        async with aiofiles.open(self.file_path, mode="r", encoding="utf-8") as file:
+        async with aiofiles.open(self.file_path, mode="rb") as file:
             async for line in file:
-                data.append(json.loads(line))
+                # Merged uploads are concatenated byte-for-byte and may contain blank lines
+                if line.strip():
+                    data.append(orjson.loads(line))
         if specific_indices is not None:
             filtered_data = [data[i] for i in specific_indices if i < len(data)]
             return filtered_data
         return data
 
+    @staticmethod
+    def _new_run_id() -> str:
+        # 秒级时间戳可能在并发运行间重复，追加随机后缀避免写入同一个 partial 文件
+        return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
     def save_results_to_csv(self, results: List[Tuple[Any, ...]], columns: List[str]):
-        df = pd.DataFrame(results, columns=columns)
-        avg_score = df["score"].mean()
-        t_cost = df["cost"].max()
-        a_cost = t_cost / len(df) if len(df) > 0 else 0
-        current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{avg_score:.5f}_{current_time}.csv"
-        output_file = os.path.join(self.log_path, filename)
-        df.to_csv(output_file, index=False)
+        # 写出的同时累计分数与成本，避免先构造 DataFrame 再逐列聚合
+        score_index = columns.index("score")
+        cost_index = columns.index("cost")
+        score_sum = 0.0
+        t_cost = 0.0
+        run_id = self._new_run_id()
+        partial_file = self._log_dir / f"partial_{run_id}.csv"
+        with open(partial_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for result in results:
+                writer.writerow(result)
+                score_sum += result[score_index]
+                t_cost = max(t_cost, result[cost_index])
+
+        avg_score = score_sum / len(results) if results else 0.0
+        a_cost = t_cost / len(results) if results else 0
+        output_file = self._log_dir / f"{avg_score:.5f}_{run_id}.csv"
+        os.replace(partial_file, output_file)
         logger.info(f"Results saved to {output_file}")
         return avg_score, a_cost, t_cost
 
@@ -60,17 +82,8 @@ class BaseBenchmark(ABC):
             "extracted_output": extracted_output,
             "extract_answer_code": extract_answer_code,
         }
-        log_file = Path(self.log_path) / "log.json"
-        if log_file.exists():
-            with log_file.open("r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-                except json.JSONDecodeError:
-                    data = []
-        else:
-            data = []
-        data.append(log_data)
-        write_json_file(log_file, data, encoding="utf-8", indent=4)
+        # 追加写 JSONL，每次只写一行，不再读回并重写整个日志文件
+        append_json_line(str(self._log_dir / "log.jsonl"), log_data)
 
     @abstractmethod
     async def evaluate_problem(self, problem: dict, agent: Callable) -> Tuple[Any, ...]:
@@ -84,15 +97,62 @@ class BaseBenchmark(ABC):
     def get_result_columns(self) -> List[str]:
         pass
 
-    async def evaluate_all_problems(self, data: List[dict], agent: Callable, max_concurrent_tasks: int = 50):
+    def estimate_problem_cost(self, problem: dict) -> int:
+        """Rough relative cost of a problem, used only to order scheduling"""
+        return 0
+
+    async def evaluate_all_problems(
+        self,
+        data: List[dict],
+        agent: Callable,
+        max_concurrent_tasks: int = 50,
+        on_result: Callable[[Tuple[Any, ...]], None] = None,
+    ):
         semaphore = asyncio.Semaphore(max_concurrent_tasks)
 
         async def sem_evaluate(problem):
             async with semaphore:
-                return await self.evaluate_problem(problem, agent)
+                result = await self.evaluate_problem(problem, agent)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        # 预计耗时长的题目先启动，避免它们排在最后拖长整体耗时；结果仍按原顺序返回
+        order = sorted(range(len(data)), key=lambda i: self.estimate_problem_cost(data[i]), reverse=True)
+        tasks = [sem_evaluate(data[i]) for i in order]
+        scheduled = await tqdm_asyncio.gather(*tasks, desc=f"Evaluating {self.name} problems", total=len(data))
+
+        results = [None] * len(data)
+        for i, result in zip(order, scheduled):
+            results[i] = result
+        return results
+
+    async def evaluate_all_problems_to_csv(self, data: List[dict], agent: Callable, max_concurrent_tasks: int = 50):
+        # Rows are appended in completion order to a partial file, renamed to the
+        # usual {avg_score}_{time}.csv once all problems are done. Rows are left to
+        # the file buffer instead of flushed one by one on the event loop
+        columns = self.get_result_columns()
+        score_index = columns.index("score")
+        run_id = self._new_run_id()
+        partial_file = self._log_dir / f"partial_{run_id}.csv"
+        score_sum = 0.0
 
-        tasks = [sem_evaluate(problem) for problem in data]
-        return await tqdm_asyncio.gather(*tasks, desc=f"Evaluating {self.name} problems", total=len(data))
+        with open(partial_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+
+            def write_row(result):
+                nonlocal score_sum
+                writer.writerow(result)
+                score_sum += result[score_index]
+
+            results = await self.evaluate_all_problems(data, agent, max_concurrent_tasks, on_result=write_row)
+
+        avg_score = score_sum / len(results) if results else 0.0
+        output_file = self._log_dir / f"{avg_score:.5f}_{run_id}.csv"
+        os.replace(partial_file, output_file)
+        logger.info(f"Results saved to {output_file}")
+        return results, avg_score
 
     async def run_evaluation(self, agent: Callable, va_list: List[int], max_concurrent_tasks: int = 50):
         data = await self.load_data(va_list)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    :   benchmarks/grader_cache.py
+@Desc    :   Persistent cache of grader verdicts shared across evaluation runs
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from utils.logs import logger
+
+def _key_text(text: str) -> str:
+    """Only case and surrounding whitespace are ignored; punctuation can change the answer ("C#" vs "C")"""
+    return str(text).strip().lower()
+
+
+class GraderVerdictCache:
+    """SQLite-backed verdict cache with TTL expiry and LRU eviction.
+
+    Keys combine the grader name, the grading prompt version, and the question,
+    correct answer and predicted answer (lowercased and stripped), so re-running
+    a dataset reuses earlier verdicts while a prompt change starts afresh.
+    Access times are buffered in memory and written with the next put().
+    Methods may be called from worker threads (asyncio.to_thread); a lock
+    serialises access to the shared connection.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 100000):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._puts_since_evict = 0
+        self._touched = {}  # key -> last access time not yet written
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            "key TEXT PRIMARY KEY, verdict REAL NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_verdicts_last_used ON verdicts(last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(grader: str, prompt_version: str, question: str, correct_answer: str, predicted_answer: str) -> str:
+        raw = "\x00".join((
+            grader,
+            prompt_version,
+            _key_text(question),
+            _key_text(correct_answer),
+            _key_text(predicted_answer),
+        ))
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[float]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT verdict FROM verdicts WHERE key = ? AND created_at > ?", (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = now
+            return row[0]
+
+    def put(self, key: str, verdict: float):
+        now = time.time()
+        with self._lock:
+            self._write_touched()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts (key, verdict, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, verdict, now, now)
+            )
+            self._conn.commit()
+
+            self._puts_since_evict += 1
+            if self._puts_since_evict >= 1000:
+                self._puts_since_evict = 0
+                self._evict(now)
+
+    def _write_touched(self):
+        """Write buffered access times; committed together with the caller's next commit"""
+        if self._touched:
+            touched, self._touched = self._touched, {}
+            self._conn.executemany(
+                "UPDATE verdicts SET last_used = ? WHERE key = ?", [(t, k) for k, t in touched.items()]
+            )
+
+    def _evict(self, now: float):
+        """Drop expired verdicts, then the least recently used ones above max_entries"""
+        self._conn.execute("DELETE FROM verdicts WHERE created_at <= ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM verdicts WHERE key IN ("
+            "SELECT key FROM verdicts ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        self._conn.commit()
+        logger.debug("Grader verdict cache evicted stale entries in %s", self.db_path)
+
+    def close(self):
+        with self._lock:
+            self._write_touched()
+            self._conn.commit()
+            self._conn.close()
@@ -6,36 +6,49 @@
 @File    : utils.py
 """
 
-import json
+import mmap
 import os
 
 import numpy as np
+import orjson
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 from pydantic_core import to_jsonable_python
 
 
-def read_json_file(json_file: str, encoding="utf-8") -> list[Any]:
+def read_json_file(json_file: str) -> list[Any]:
     if not Path(json_file).exists():
         raise FileNotFoundError(f"json_file: {json_file} not exist, return []")
 
-    with open(json_file, "r", encoding=encoding) as fin:
-        try:
-            data = json.load(fin)
-        except Exception:
-            raise ValueError(f"read json file: {json_file} failed")
+    try:
+        data = orjson.loads(Path(json_file).read_bytes())
+    except Exception:
+        raise ValueError(f"read json file: {json_file} failed")
     return data
 
 
-def write_json_file(json_file: str, data: list, encoding: str = None, indent: int = 4):
+def write_json_file(json_file: str, data: list, indent: bool = False):
+    """Write data as UTF-8 JSON; indent only for files meant to be read by people"""
     folder_path = Path(json_file).parent
     if not folder_path.exists():
         folder_path.mkdir(parents=True, exist_ok=True)
 
-    with open(json_file, "w", encoding=encoding) as fout:
-        json.dump(data, fout, ensure_ascii=False, indent=indent, default=to_jsonable_python)
+    option = orjson.OPT_SERIALIZE_NUMPY
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    # Write to a sibling temp file and rename, so readers never see a half-written file
+    tmp_file = f"{json_file}.tmp"
+    Path(tmp_file).write_bytes(orjson.dumps(data, default=to_jsonable_python, option=option))
+    os.replace(tmp_file, json_file)
 
 
+def append_json_line(json_file: str, data: Any):
+    """Append one record to a JSONL file without rereading what is already there"""
+    os.makedirs(os.path.dirname(json_file) or ".", exist_ok=True)
+
+    with open(json_file, "ab", buffering=1 << 16) as fout:
+        fout.write(orjson.dumps(data, default=to_jsonable_python, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n")
+
 
 def generate_random_indices(n, n_samples, test=False):
     """
@@ -54,14 +67,45 @@ def generate_random_indices(n, n_samples, test=False):
         return indices[:n_samples]
 
 
-def split_data_set(file_path, samples, test=False):
-    data = []
+def _load_line_offsets(file_path) -> np.ndarray:
+    """
+    Byte offsets of each line start plus the file size, persisted to <file>.idx
+    """
+    idx_path = f"{file_path}.idx"
+    size = os.path.getsize(file_path)
+    if os.path.exists(idx_path) and os.path.getmtime(idx_path) >= os.path.getmtime(file_path):
+        offsets = np.fromfile(idx_path, dtype=np.uint64)
+        if len(offsets) and int(offsets[-1]) == size:
+            return offsets
+
+    offsets = [0]
+    if size:
+        with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = mm.find(b"\n")
+            while pos != -1:
+                offsets.append(pos + 1)
+                pos = mm.find(b"\n", pos + 1)
+    if offsets[-1] != size:
+        # Last line has no trailing newline
+        offsets.append(size)
+
+    offsets = np.array(offsets, dtype=np.uint64)
+    try:
+        offsets.tofile(idx_path)
+    except OSError:
+        pass
+    return offsets
+
 
-    with open(file_path, "r") as file:
-        for line in file:
-            data.append(json.loads(line))
-    random_indices = generate_random_indices(len(data), samples, test)
-    data = [data[i] for i in random_indices]
+def split_data_set(file_path, samples, test=False):
+    # The line index is built once per dataset; only sampled lines are read and parsed
+    offsets = _load_line_offsets(file_path)
+    random_indices = generate_random_indices(len(offsets) - 1, samples, test).tolist()
+    if not random_indices:
+        return []
+
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = [orjson.loads(mm[int(offsets[i]):int(offsets[i + 1])]) for i in random_indices]
     return data
 
 
@@ -73,18 +117,16 @@ def log_mismatch(problem, expected_output, prediction, predicted_number, path):
         "extracted_output": predicted_number,
     }
 
-    log_file = os.path.join(path, "log.json")
+    append_json_line(os.path.join(path, "log.jsonl"), log_data)
 
-    # Check if the log file already exists
-    if os.path.exists(log_file):
-        # If it exists, load the existing log data
-        data = read_json_file(log_file)
-    else:
-        # If it does not exist, create a new log list
-        data = []
 
-    # Add the new log entry
-    data.append(log_data)
+def read_mismatch_log(path) -> Iterator[dict]:
+    """Stream the entries written by log_mismatch"""
+    log_file = os.path.join(path, "log.jsonl")
+    if not os.path.exists(log_file):
+        return
 
-    # Write the data back to log.json file
-    write_json_file(log_file, data, encoding="utf-8", indent=4)
+    with open(log_file, "rb") as fin:
+        for line in fin:
+            if line.strip():
+                yield orjson.loads(line)
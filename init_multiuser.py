@@ -5,7 +5,6 @@
 """
 
 import os
-import json
 from pathlib import Path
 from datetime import datetime
 
@@ -16,8 +15,6 @@ def init_user_data_structure():
     # 创建基本目录
     directories = [
         base_dir,
-        base_dir / "users",
-        base_dir / "shared",
         Path("workspace"),
         Path("temp_uploads"),
         Path("logs")
@@ -27,23 +24,15 @@ def init_user_data_structure():
         directory.mkdir(parents=True, exist_ok=True)
         print(f"✅ 创建目录: {directory}")
     
-    # 初始化基本数据文件
-    files_to_init = {
-        base_dir / "users.json": {},
-        base_dir / "sessions.json": {},
-        base_dir / "shared" / "all_tasks.json": {},
-    }
-    
-    for file_path, default_data in files_to_init.items():
-        if not file_path.exists():
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(default_data, f, indent=2, ensure_ascii=False)
-            print(f"✅ 创建文件: {file_path}")
-        else:
-            print(f"📁 文件已存在: {file_path}")
+    # 初始化SQLite数据库（用户、会话、任务、文件记录），已有的旧版JSON数据会自动导入
+    from utils.user_manager import UserManager, UserDataManager, DB_FILENAME
+    UserManager(str(base_dir))
+    UserDataManager(str(base_dir))
+    print(f"✅ 初始化数据库: {base_dir / DB_FILENAME}")
     
     # 创建 .gitignore 忽略敏感数据
     gitignore_content = """# 用户数据 - 包含敏感信息，不提交到版本控制
+user_data/user_data.db*
 user_data/users.json
 user_data/sessions.json
 user_data/users/*/
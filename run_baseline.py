@@ -7,10 +7,11 @@
 """
 
 import asyncio
+import os
 from utils.logs import logger
 
 from benchmarks.InteractComp import InteractCompBenchmark
-from workflow.InteractComp import InteractCompAgent, create_multi_model_agent_factory
+from workflow.InteractComp import InteractCompAgentFactory, create_multi_model_agent_factory
 
 # 评估模型配置
 SINGLE_MODEL_CONFIGS = [
@@ -25,6 +26,17 @@ MULTI_MODEL_CONFIGS = [
     "claude-4-sonnet"
 ]
 
+# 同时评估的题目数，可通过环境变量 MAX_CONCURRENT_TASKS 调整（受限于API限流）
+MAX_CONCURRENT_TASKS = int(os.environ.get("MAX_CONCURRENT_TASKS", "50"))
+# 评分结果持久化缓存的SQLite路径，可通过环境变量 GRADER_CACHE_PATH 设置，未设置时不启用
+GRADER_CACHE_PATH = os.environ.get("GRADER_CACHE_PATH") or None
+
+def make_single_model_agent(agent_factory: InteractCompAgentFactory, model_config: str):
+    """每道题创建新的Agent：Agent 持有当前题目的上下文和累计成本，并发评估时不能共享"""
+    async def agent(problem: dict):
+        return await agent_factory(model_config)(problem)
+    return agent
+
 async def run_single_model_evaluation():
     """运行单模型评估（原有模式）"""
     dataset_path = "data/data.jsonl"
@@ -36,28 +48,29 @@ async def run_single_model_evaluation():
     for model_config in SINGLE_MODEL_CONFIGS:
         print(f"\n🚀 Running single model evaluation: {model_config}")
         
-        # 创建单个Agent
-        agent = InteractCompAgent(
-            name=f"SingleAgent_{model_config}",
-            llm_config=model_config,
+        # 创建Agent工厂，每道题使用独立的Agent
+        agent_factory = InteractCompAgentFactory(
+            base_name="SingleAgent",
             dataset="InteractComp",
             prompt=prompt,
             max_turns=5,
             search_engine_type="google",
             user_config="gpt-4o"
         )
+        agent = make_single_model_agent(agent_factory, model_config)
 
         # 创建单模型基准测试
         benchmark = InteractCompBenchmark(
             name=f"SingleModel_{model_config}", 
             file_path=dataset_path, 
             log_path=f"{log_path}/single_{model_config}/",
-            grader_config="gpt-4o"
+            grader_config="gpt-4o",
+            grader_cache_path=GRADER_CACHE_PATH
             # 不传入models参数，使用单模型模式
         )
 
         # 运行评估
-        avg_score, avg_cost, total_cost = await benchmark.run_baseline(agent, max_concurrent_tasks=20)
+        avg_score, avg_cost, total_cost = await benchmark.run_baseline(agent, max_concurrent_tasks=MAX_CONCURRENT_TASKS)
         
         results_summary.append({
             "model": model_config,
@@ -93,13 +106,14 @@ async def run_multi_model_evaluation():
         file_path=dataset_path, 
         log_path=log_path,
         grader_config="gpt-4o",
+        grader_cache_path=GRADER_CACHE_PATH,
         models=MULTI_MODEL_CONFIGS  # 传入模型列表启用多模型模式
     )
 
     # 运行多模型评估
     results = await benchmark.run_multi_model_evaluation(
         agent_factory, 
-        max_concurrent_tasks=20
+        max_concurrent_tasks=MAX_CONCURRENT_TASKS
     )
     
     print(f"\n🎯 Multi-Model Evaluation Results:")
@@ -110,7 +124,7 @@ async def run_multi_model_evaluation():
     print(f"💰 Average Cost: ${results['avg_cost']:.4f}")
     
     # 显示质量不合格的问题
-    failed_items = [item for item in results['detailed_results'] if item['quality_failed']]
+    failed_items = results['failed_items']
     if failed_items:
         print(f"\n⚠️  Quality Failed Items (first 5):")
         for i, item in enumerate(failed_items[:5], 1):
@@ -5,6 +5,7 @@
 """
 
 import asyncio
+import importlib.util
 import os
 import sys
 from pathlib import Path
@@ -27,13 +28,14 @@ def check_environment():
     
     print(f"✅ Python版本: {sys.version}")
     
-    # 检查必需的目录
+    # 检查必需的目录（一次 scandir 列出项目根目录，不再逐个 stat）
     dirs_to_check = ['config', 'user_data', 'workspace', 'temp_uploads', 'logs']
+    with os.scandir(project_root) as entries:
+        existing_dirs = {entry.name for entry in entries if entry.is_dir()}
     for dir_name in dirs_to_check:
-        dir_path = project_root / dir_name
-        if not dir_path.exists():
+        if dir_name not in existing_dirs:
             print(f"📁 创建目录: {dir_name}")
-            dir_path.mkdir(parents=True, exist_ok=True)
+            os.makedirs(project_root / dir_name, exist_ok=True)
         else:
             print(f"✅ 目录存在: {dir_name}")
     
@@ -115,7 +117,13 @@ def start_services():
         print("🔧 配置状态: http://localhost:8000/config/status")
         print("🎯 多用户登录: http://localhost:3000")
         
-        uvicorn.run(app, host="0.0.0.0", port=8000)
+        # 显式使用 uvloop + httptools（uvicorn[standard] 提供），缺失时回退到纯 Python 实现；
+        # 任务状态保存在进程内，因此保持单 worker
+        loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+        http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+        print(f"⚡ 事件循环: {loop}, HTTP解析器: {http}")
+        
+        uvicorn.run(app, host="0.0.0.0", port=8000, loop=loop, http=http)
         
     except KeyboardInterrupt:
         print("\n👋 服务已停止")
@@ -7,11 +7,15 @@
 from openai import AsyncOpenAI
 from utils.formatter import BaseFormatter, FormatError
 
+import httpx
 import yaml
 from pathlib import Path
 from typing import Dict, Optional, Any
 from utils.logs import logger
 
+# Use libyaml's C loader when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 class LLMConfig:
     def __init__(self, config: dict):
         self.model = config.get("model", "gpt-4o-mini")
@@ -52,7 +56,7 @@ class LLMsConfig:
             
             # Load the YAML file
             with open(config_file, 'r', encoding='utf-8') as f:
-                config_data = yaml.safe_load(f)
+                config_data = yaml.load(f, Loader=_YAML_LOADER)
             
             # Your YAML has a 'models' top-level key that contains the model configs
             if 'models' in config_data:
@@ -164,6 +168,44 @@ class TokenUsageTracker:
             "history": self.usage_history
         }
 
+# One keep-alive connection pool for every LLM client in the process, so agents,
+# user agents and graders created per problem reuse TCP/TLS connections
+_HTTP_LIMITS = httpx.Limits(max_connections=256, max_keepalive_connections=128)
+_shared_http_client: Optional[httpx.AsyncClient] = None
+_openai_clients: Dict[tuple, AsyncOpenAI] = {}
+
+
+def get_shared_http_client() -> httpx.AsyncClient:
+    """Get the process-wide httpx client used by all AsyncOpenAI clients"""
+    global _shared_http_client
+    if _shared_http_client is None:
+        _shared_http_client = httpx.AsyncClient(
+            limits=_HTTP_LIMITS,
+            timeout=httpx.Timeout(600.0, connect=5.0),
+            follow_redirects=True,
+        )
+    return _shared_http_client
+
+
+async def close_shared_http_client() -> None:
+    """Close the shared httpx client and drop the AsyncOpenAI clients built on it"""
+    global _shared_http_client
+    client, _shared_http_client = _shared_http_client, None
+    _openai_clients.clear()
+    if client is not None:
+        await client.aclose()
+
+
+def get_openai_client(api_key: Optional[str], base_url: str) -> AsyncOpenAI:
+    """Get a cached AsyncOpenAI client for an endpoint, backed by the shared connection pool"""
+    key = (api_key, base_url)
+    client = _openai_clients.get(key)
+    if client is None:
+        client = _openai_clients[key] = AsyncOpenAI(
+            api_key=api_key, base_url=base_url, http_client=get_shared_http_client()
+        )
+    return client
+
 class AsyncLLM:
     def __init__(self, config, system_msg:str = None):
         """
@@ -181,12 +223,22 @@ class AsyncLLM:
         
         # At this point, config should be an LLMConfig instance
         self.config = config
-        self.aclient = AsyncOpenAI(api_key=self.config.key, base_url=self.config.base_url)
         self.sys_msg = system_msg
         self.usage_tracker = TokenUsageTracker()
         
+    @property
+    def aclient(self) -> AsyncOpenAI:
+        """Resolved on every call, so long-lived instances pick up a new pool after close_shared_http_client()"""
+        return get_openai_client(self.config.key, self.config.base_url)
+
 
-    async def __call__(self, prompt, temperature: Optional[float] = None, top_p: Optional[float] = None):
+    async def __call__(
+        self,
+        prompt,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ):
         message = []
         if self.sys_msg is not None:
             message.append({
@@ -199,11 +251,15 @@ class AsyncLLM:
         temperature_call = temperature if temperature is not None else self.config.temperature
         top_p_call = top_p if top_p is not None else self.config.top_p
 
+        # Only cap the completion length when asked to, so other callers keep the model default
+        extra_args = {} if max_tokens is None else {"max_tokens": max_tokens}
+
         response = await self.aclient.chat.completions.create(
             model=self.config.model,
             messages=message,
             temperature= temperature_call,
             top_p = top_p_call,
+            **extra_args,
         )
         # Extract token usage from response
         input_tokens = response.usage.prompt_tokens
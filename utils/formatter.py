@@ -5,8 +5,7 @@
 
 from typing import Dict, List, Tuple, Type, Optional, Union, Any
 
-from pydantic import BaseModel, Field, create_model
-import re
+from pydantic import BaseModel, Field, PrivateAttr, create_model
 
 from abc import ABC, abstractmethod
 
@@ -36,6 +35,9 @@ class XmlFormatter(BaseFormatter):
     """Formatter for XML responses"""
     model: Optional[Type[BaseModel]] = None
     fields: Dict[str, Any] = Field(default_factory=dict)
+    _field_tags: Optional[Dict[str, Tuple[str, str]]] = PrivateAttr(default=None)
+    _prompt_suffix: Optional[str] = PrivateAttr(default=None)
+    _required_fields: Optional[Tuple[str, ...]] = PrivateAttr(default=None)
 
     @classmethod
     def from_dict(cls, fields_dict: Dict[str, str]) -> "XmlFormatter":
@@ -81,30 +83,64 @@ class XmlFormatter(BaseFormatter):
             return self.model.model_fields[field_name].description
         return ""    
     
-    def prepare_prompt(self, prompt: str) -> str:
-        examples = []
-        for field_name in self._get_field_names():
-            description = self._get_field_description(field_name)
-            examples.append(f"<{field_name}>{description}</{field_name}>")
+    def _get_field_tags(self) -> Dict[str, Tuple[str, str]]:
+        """Build the opening/closing tag strings per declared field, once per formatter"""
+        if self._field_tags is None:
+            self._field_tags = {name: (f"<{name}>", f"</{name}>") for name in self._get_field_names()}
+        return self._field_tags
 
-        example_str = "\n".join(examples)
-        
-        instructions = prompt + f"\n# You can output anything, but in the final, you need to provide the following fields, and make sure to warp it with xml tags:\n{example_str}"
-        return instructions
+    def _get_required_fields(self) -> Tuple[str, ...]:
+        """Names of fields that must be present and non-empty, resolved from the model once"""
+        if self._required_fields is None:
+            self._required_fields = tuple(
+                name for name in self._get_field_names()
+                if self.model.model_fields[name].default is None and self.model.model_fields[name].default_factory is None
+            )
+        return self._required_fields
+
+    @staticmethod
+    def _find_last_tag_content(response: str, open_tag: str, close_tag: str) -> Optional[str]:
+        """Stripped content of the last complete <tag>...</tag> pair, found with plain substring search"""
+        end = len(response)
+        while True:
+            start = response.rfind(open_tag, 0, end)
+            if start < 0:
+                return None
+            start += len(open_tag)
+            close = response.find(close_tag, start)
+            if close >= 0:
+                # Only pay for strip() when the value actually has surrounding whitespace
+                if close > start and (response[start].isspace() or response[close - 1].isspace()):
+                    return response[start:close].strip()
+                return response[start:close]
+            # This opening tag is never closed; try the previous one
+            end = start - len(open_tag)
+    
+    def _get_prompt_suffix(self) -> str:
+        """Build the format instructions appended to every prompt, once per formatter"""
+        if self._prompt_suffix is None:
+            example_str = "\n".join(
+                f"<{field_name}>{self._get_field_description(field_name)}</{field_name}>"
+                for field_name in self._get_field_names()
+            )
+            self._prompt_suffix = f"\n# You can output anything, but in the final, you need to provide the following fields, and make sure to warp it with xml tags:\n{example_str}"
+        return self._prompt_suffix
+
+    def prepare_prompt(self, prompt: str) -> str:
+        return prompt + self._get_prompt_suffix()
     
     def validate_response(self, response: str) -> Tuple[bool, dict]:
         """Validate if the response contains all required fields in XML format"""
         try:
-            pattern = r"<(\w+)>(.*?)</\1>"
-            matches = re.findall(pattern, response, re.DOTALL)
-            
-            found_fields = {match[0]: match[1].strip() for match in matches}
+            # Only the declared fields are searched; the last occurrence of a tag wins
+            found_fields = {}
+            for field_name, (open_tag, close_tag) in self._get_field_tags().items():
+                content = self._find_last_tag_content(response, open_tag, close_tag)
+                if content is not None:
+                    found_fields[field_name] = content
             
-            for field_name in self._get_field_names():
-                field = self.model.model_fields[field_name]
-                is_required = field.default is None and field.default_factory is None
-                
-                if is_required and (field_name not in found_fields or not found_fields[field_name]):
+            for field_name in self._get_required_fields():
+                if not found_fields.get(field_name):
                     raise FormatError(f"Field '{field_name}' is missing or empty.")
 
             return True, found_fields
@@ -3,8 +3,11 @@
 # @Author  : Claude
 # @Desc    : Simple colored logger with file output
 
+import atexit
 import os
+import queue
 import sys
+import threading
 import time
 from datetime import datetime
 from enum import Enum
@@ -40,7 +43,8 @@ class SimpleLogger:
         log_level: Union[int, LogLevel] = LogLevel.INFO,
         log_file: Optional[str] = None,
         log_dir: str = "logs",
-        console_output: bool = True
+        console_output: bool = True,
+        background: bool = False
     ):
         """
         Initialize the Logger
@@ -51,6 +55,7 @@ class SimpleLogger:
             log_file: Log file name (if None, will use name_YYYY-MM-DD.log)
             log_dir: Directory to store log files
             console_output: Whether to output logs to console
+            background: Whether to write records on a background thread
         """
         self.name = name
         
@@ -74,14 +79,53 @@ class SimpleLogger:
             
             file_path = os.path.join(log_dir, log_file)
             self.file_output = open(file_path, 'a', encoding='utf-8')
+        
+        # Background writer: callers only enqueue records, so console/file I/O
+        # never blocks the caller (e.g. an asyncio event loop)
+        self._queue = None
+        self._writer = None
+        if background:
+            self._queue = queue.SimpleQueue()
+            self._writer = threading.Thread(target=self._drain_queue, name=f"{name}-log-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+    
+    def isEnabledFor(self, level: Union[int, LogLevel]) -> bool:
+        """Check whether messages at the given level would be emitted"""
+        if isinstance(level, LogLevel):
+            level = level.value[0]
+        return level >= self.log_level
     
-    def _log(self, level: LogLevel, message: str) -> None:
+    def _log(self, level: LogLevel, message: str, args: tuple = ()) -> None:
         """Internal method to log messages at specified level"""
         if level.value[0] < self.log_level:
             return
-            
+        
+        # Apply %-style arguments on the caller thread, once the message is known
+        # to be emitted, so mutable arguments are captured as they are right now
+        if args:
+            message = message % args
+        
+        if self._queue is not None:
+            self._queue.put((datetime.now(), level, message))
+        else:
+            self._emit(datetime.now(), level, message)
+    
+    def _drain_queue(self) -> None:
+        """Write queued records until the stop sentinel arrives"""
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            try:
+                self._emit(*record)
+            except Exception as e:
+                sys.stderr.write(f"{self.name} logger failed to write record: {e}\n")
+    
+    def _emit(self, created: datetime, level: LogLevel, message: str) -> None:
+        """Format a record and write it to the enabled outputs"""
         # Format the log message
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = created.strftime("%Y-%m-%d %H:%M:%S")
         level_name = level.name
         formatted_msg = f"{timestamp} - {level_name} - {message}"
         
@@ -100,25 +144,31 @@ class SimpleLogger:
             self.file_output.write(formatted_msg + "\n")
             self.file_output.flush()
     
-    def debug(self, message: str) -> None:
+    def debug(self, message: str, *args) -> None:
         """Log a debug message"""
-        self._log(LogLevel.DEBUG, message)
+        self._log(LogLevel.DEBUG, message, args)
     
-    def info(self, message: str) -> None:
+    def info(self, message: str, *args) -> None:
         """Log an info message"""
-        self._log(LogLevel.INFO, message)
+        self._log(LogLevel.INFO, message, args)
     
-    def warning(self, message: str) -> None:
+    def warning(self, message: str, *args) -> None:
         """Log a warning message"""
-        self._log(LogLevel.WARNING, message)
+        self._log(LogLevel.WARNING, message, args)
     
-    def error(self, message: str) -> None:
+    def error(self, message: str, *args) -> None:
         """Log an error message"""
-        self._log(LogLevel.ERROR, message)
+        self._log(LogLevel.ERROR, message, args)
     
-    def critical(self, message: str) -> None:
+    def critical(self, message: str, *args) -> None:
         """Log a critical message"""
-        self._log(LogLevel.CRITICAL, message)
+        self._log(LogLevel.CRITICAL, message, args)
+    
+    def close(self) -> None:
+        """Flush pending background records and stop the writer thread"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
     
     def __del__(self):
         """Close file handle when logger is destroyed"""
@@ -126,7 +176,7 @@ class SimpleLogger:
             self.file_output.close()
 
 # Create a singleton instance for easy import
-logger = SimpleLogger()
+logger = SimpleLogger(background=True)
 
 def test_logger():
     """Test function to verify the SimpleLogger functionality"""
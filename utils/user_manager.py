@@ -1,349 +1,414 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-用户管理模块 - 基于JSON文件存储
+用户管理模块 - 基于SQLite存储（WAL模式）
 """
 
-import json
-import os
+import asyncio
+import sqlite3
+import threading
+import time
 import uuid
-from datetime import datetime, timedelta
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
-import hashlib
 import secrets
 
+import orjson
+from passlib.context import CryptContext
+
 from utils.logs import logger
 
+DB_FILENAME = "user_data.db"
+SESSION_TTL_SECONDS = 24 * 3600
+
+# 新密码使用 bcrypt（自带盐）；旧版无盐 SHA-256 仍可验证，并在下次登录成功时自动升级
+_pwd_context = CryptContext(schemes=["bcrypt", "hex_sha256"], deprecated=["hex_sha256"])
+
+# 会话过期时间存 Unix 时间戳，校验时直接做数值比较，无需解析日期字符串
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL UNIQUE,
+    display_name TEXT,
+    password_hash TEXT NOT NULL,
+    created_at TEXT,
+    last_login TEXT,
+    is_active INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    token TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_at TEXT,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at);
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    user_id TEXT,
+    json_blob TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_id ON tasks(user_id);
+CREATE TABLE IF NOT EXISTS files (
+    file_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    json_blob TEXT NOT NULL,
+    uploaded_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_files_user_id ON files(user_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class _SQLiteStore:
+    """同一数据目录共享一个连接；sqlite3 连接不是线程安全的，所有访问都经过同一把锁"""
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = data_dir
+        self.db_path = data_dir / DB_FILENAME
+        # 数据目录只在进程内首次打开存储时创建一次
+        data_dir.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 下 NORMAL 只在检查点时 fsync，提交不再逐次刷盘；掉电最多丢最近的提交，数据库不会损坏
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self._import_legacy_json()
+
+    @contextmanager
+    def transaction(self):
+        """在锁内执行一组写操作，正常退出时提交，异常时回滚"""
+        with self.lock, self.conn:
+            yield self.conn
+
+    def query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def _import_legacy_json(self):
+        """首次打开数据库时导入旧版JSON文件中的数据（原文件保留不动）"""
+        if self.query_one("SELECT 1 FROM meta WHERE key = 'legacy_json_imported'"):
+            return
+
+        users = _read_legacy_json(self.data_dir / "users.json")
+        sessions = _read_legacy_json(self.data_dir / "sessions.json")
+        shared_tasks = _read_legacy_json(self.data_dir / "shared" / "all_tasks.json")
+
+        with self.transaction() as conn:
+            for username, user in users.items():
+                conn.execute(
+                    "INSERT OR IGNORE INTO users (username, user_id, display_name, password_hash, created_at, last_login, is_active) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (username, user["user_id"], user.get("display_name", username), user["password_hash"],
+                     user.get("created_at"), user.get("last_login"), int(user.get("is_active", True)))
+                )
+
+            for token, session in sessions.items():
+                conn.execute(
+                    "INSERT OR IGNORE INTO sessions (token, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (token, session["user_id"], session.get("created_at"), _to_timestamp(session["expires_at"]))
+                )
+
+            for task_id, task in shared_tasks.items():
+                _insert_task(conn, task_id, task.get("user_id"), task, ignore_existing=True)
+
+            users_dir = self.data_dir / "users"
+            if users_dir.exists():
+                for user_dir in users_dir.iterdir():
+                    user_id = user_dir.name
+                    for task_id, task in _read_legacy_json(user_dir / "tasks.json").items():
+                        _insert_task(conn, task_id, user_id, {**task, "user_id": user_id}, ignore_existing=True)
+                    for file_id, file_info in _read_legacy_json(user_dir / "files.json").items():
+                        conn.execute(
+                            "INSERT OR IGNORE INTO files (file_id, user_id, json_blob, uploaded_at) VALUES (?, ?, ?, ?)",
+                            (file_id, user_id, _dumps(file_info), file_info.get("uploaded_at"))
+                        )
+
+            conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_json_imported', ?)", (datetime.now().isoformat(),))
+
+        if users or sessions or shared_tasks:
+            logger.info(f"已从旧版JSON文件导入用户数据: {len(users)} 个用户, {len(shared_tasks)} 个任务")
+
+
+_stores: Dict[Path, _SQLiteStore] = {}
+_stores_lock = threading.Lock()
+
+
+def _get_store(data_dir: Path) -> _SQLiteStore:
+    """按数据目录获取共享的存储实例"""
+    key = data_dir.resolve()
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = _SQLiteStore(data_dir)
+        return store
+
+
+def _read_legacy_json(file_path: Path) -> dict:
+    try:
+        return orjson.loads(file_path.read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return {}
+
+
+def _to_timestamp(value) -> float:
+    """旧数据中的 ISO 时间字符串转为 Unix 时间戳"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+def _dumps(data: Dict) -> str:
+    """序列化为存入 json_blob 列的文本（orjson 输出 UTF-8，不转义中文）"""
+    return orjson.dumps(data).decode()
+
+
+def _insert_task(conn: sqlite3.Connection, task_id: str, user_id: Optional[str], task: Dict, ignore_existing: bool = False):
+    verb = "INSERT OR IGNORE" if ignore_existing else "INSERT"
+    conn.execute(
+        f"{verb} INTO tasks (task_id, user_id, json_blob, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+        (task_id, user_id, _dumps(task), task.get("created_at"), task.get("updated_at"))
+    )
+
+
 class UserManager:
-    """用户管理器 - 基于JSON文件存储"""
-    
+    """用户管理器 - 基于SQLite存储"""
+
     def __init__(self, data_dir: str = "user_data"):
         self.data_dir = Path(data_dir)
-        self.data_dir.mkdir(exist_ok=True)
-        
-        self.users_file = self.data_dir / "users.json"
-        self.sessions_file = self.data_dir / "sessions.json"
-        
-        # 初始化数据文件
-        self._init_data_files()
-    
-    def _init_data_files(self):
-        """初始化数据文件"""
-        if not self.users_file.exists():
-            self._save_json(self.users_file, {})
-        
-        if not self.sessions_file.exists():
-            self._save_json(self.sessions_file, {})
-    
-    def _load_json(self, file_path: Path) -> dict:
-        """加载JSON文件"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-    
-    def _save_json(self, file_path: Path, data: dict):
-        """保存JSON文件"""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-    
+        self.store = _get_store(self.data_dir)
+
     def _hash_password(self, password: str) -> str:
         """哈希密码"""
-        return hashlib.sha256(password.encode()).hexdigest()
-    
+        return _pwd_context.hash(password)
+
     def register_user(self, username: str, password: str, display_name: str = None) -> Dict:
         """注册用户"""
-        users = self._load_json(self.users_file)
-        
-        # 检查用户名是否已存在
-        if username in users:
-            raise ValueError(f"用户名 {username} 已存在")
-        
-        # 创建用户
         user_id = str(uuid.uuid4())
-        user_data = {
-            "user_id": user_id,
-            "username": username,
-            "display_name": display_name or username,
-            "password_hash": self._hash_password(password),
-            "created_at": datetime.now().isoformat(),
-            "last_login": None,
-            "is_active": True
-        }
-        
-        users[username] = user_data
-        self._save_json(self.users_file, users)
-        
-        # 创建用户目录
-        user_dir = self.data_dir / "users" / user_id
-        user_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 创建用户的任务和文件记录
-        (user_dir / "tasks.json").write_text('{}', encoding='utf-8')
-        (user_dir / "files.json").write_text('{}', encoding='utf-8')
-        
+        display_name = display_name or username
+        # bcrypt 较慢，在持有存储锁之前算好
+        password_hash = self._hash_password(password)
+
+        try:
+            with self.store.transaction() as conn:
+                conn.execute(
+                    "INSERT INTO users (username, user_id, display_name, password_hash, created_at, last_login, is_active) "
+                    "VALUES (?, ?, ?, ?, ?, NULL, 1)",
+                    (username, user_id, display_name, password_hash, datetime.now().isoformat())
+                )
+        except sqlite3.IntegrityError:
+            # 检查用户名是否已存在
+            raise ValueError(f"用户名 {username} 已存在")
+
         logger.info(f"用户注册成功: {username} (ID: {user_id})")
-        return {"user_id": user_id, "username": username, "display_name": user_data["display_name"]}
-    
+        return {"user_id": user_id, "username": username, "display_name": display_name}
+
+    async def register_user_async(self, username: str, password: str, display_name: str = None) -> Dict:
+        """在线程池中注册用户，bcrypt 哈希不阻塞事件循环"""
+        return await asyncio.to_thread(self.register_user, username, password, display_name)
+
     def authenticate_user(self, username: str, password: str) -> Optional[Dict]:
         """验证用户"""
-        users = self._load_json(self.users_file)
-        
-        if username not in users:
+        user = self.store.query_one(
+            "SELECT user_id, username, display_name, password_hash, is_active FROM users WHERE username = ?",
+            (username,)
+        )
+
+        if user is None:
             return None
-        
-        user = users[username]
+
         if not user["is_active"]:
             return None
-        
-        if user["password_hash"] != self._hash_password(password):
+
+        # 先按用户名查到记录再做（较慢的）哈希校验，比较为常量时间
+        verified, upgraded_hash = _pwd_context.verify_and_update(password, user["password_hash"])
+        if not verified:
             return None
-        
-        # 更新最后登录时间
-        user["last_login"] = datetime.now().isoformat()
-        users[username] = user
-        self._save_json(self.users_file, users)
-        
+
+        # 更新最后登录时间，旧版哈希顺带升级为 bcrypt
+        with self.store.transaction() as conn:
+            conn.execute(
+                "UPDATE users SET last_login = ?, password_hash = COALESCE(?, password_hash) WHERE username = ?",
+                (datetime.now().isoformat(), upgraded_hash, username)
+            )
+
         return {
             "user_id": user["user_id"],
             "username": user["username"],
             "display_name": user["display_name"]
         }
-    
+
+    async def authenticate_user_async(self, username: str, password: str) -> Optional[Dict]:
+        """在线程池中验证用户，bcrypt 校验不阻塞事件循环"""
+        return await asyncio.to_thread(self.authenticate_user, username, password)
+
     def create_session(self, user_id: str) -> str:
         """创建用户会话"""
-        sessions = self._load_json(self.sessions_file)
-        
         session_token = secrets.token_urlsafe(32)
-        session_data = {
-            "user_id": user_id,
-            "created_at": datetime.now().isoformat(),
-            "expires_at": (datetime.now() + timedelta(hours=24)).isoformat()
-        }
-        
-        sessions[session_token] = session_data
-        self._save_json(self.sessions_file, sessions)
-        
+
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT INTO sessions (token, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (session_token, user_id, datetime.now().isoformat(), time.time() + SESSION_TTL_SECONDS)
+            )
+
         return session_token
-    
+
     def validate_session(self, session_token: str) -> Optional[str]:
         """验证会话并返回用户ID"""
-        sessions = self._load_json(self.sessions_file)
-        
-        if session_token not in sessions:
+        session = self.store.query_one("SELECT user_id, expires_at FROM sessions WHERE token = ?", (session_token,))
+
+        if session is None:
             return None
-        
-        session = sessions[session_token]
-        expires_at = datetime.fromisoformat(session["expires_at"])
-        
-        if datetime.now() > expires_at:
+
+        if time.time() > session["expires_at"]:
             # 会话过期，删除
-            del sessions[session_token]
-            self._save_json(self.sessions_file, sessions)
+            with self.store.transaction() as conn:
+                conn.execute("DELETE FROM sessions WHERE token = ?", (session_token,))
             return None
-        
+
         return session["user_id"]
-    
+
+    def delete_session(self, session_token: str):
+        """删除会话（登出）"""
+        with self.store.transaction() as conn:
+            conn.execute("DELETE FROM sessions WHERE token = ?", (session_token,))
+
+    async def validate_session_async(self, session_token: str) -> Optional[str]:
+        """在线程池中验证会话"""
+        return await asyncio.to_thread(self.validate_session, session_token)
+
     def get_user_info(self, user_id: str) -> Optional[Dict]:
         """获取用户信息"""
-        users = self._load_json(self.users_file)
-        
-        for username, user_data in users.items():
-            if user_data["user_id"] == user_id:
-                return {
-                    "user_id": user_data["user_id"],
-                    "username": user_data["username"],
-                    "display_name": user_data["display_name"],
-                    "created_at": user_data["created_at"],
-                    "last_login": user_data["last_login"]
-                }
-        return None
-    
+        user = self.store.query_one(
+            "SELECT user_id, username, display_name, created_at, last_login FROM users WHERE user_id = ?",
+            (user_id,)
+        )
+        return dict(user) if user is not None else None
+
     def list_all_users(self) -> List[Dict]:
         """列出所有用户（管理功能）"""
-        users = self._load_json(self.users_file)
-        return [
-            {
-                "user_id": user_data["user_id"],
-                "username": user_data["username"],
-                "display_name": user_data["display_name"],
-                "created_at": user_data["created_at"],
-                "last_login": user_data["last_login"],
-                "is_active": user_data["is_active"]
-            }
-            for user_data in users.values()
-        ]
-    
+        rows = self.store.query(
+            "SELECT user_id, username, display_name, created_at, last_login, is_active FROM users ORDER BY rowid"
+        )
+        return [{**dict(row), "is_active": bool(row["is_active"])} for row in rows]
+
     def cleanup_expired_sessions(self):
         """清理过期会话"""
-        sessions = self._load_json(self.sessions_file)
-        now = datetime.now()
-        
-        expired_tokens = []
-        for token, session_data in sessions.items():
-            expires_at = datetime.fromisoformat(session_data["expires_at"])
-            if now > expires_at:
-                expired_tokens.append(token)
-        
-        for token in expired_tokens:
-            del sessions[token]
-        
-        if expired_tokens:
-            self._save_json(self.sessions_file, sessions)
-            logger.info(f"清理了 {len(expired_tokens)} 个过期会话")
+        with self.store.transaction() as conn:
+            deleted = conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),)).rowcount
+
+        if deleted:
+            logger.info(f"清理了 {deleted} 个过期会话")
 
 
 class UserDataManager:
     """用户数据管理器"""
-    
+
     def __init__(self, data_dir: str = "user_data"):
         self.data_dir = Path(data_dir)
-        self.users_dir = self.data_dir / "users"
-        self.shared_dir = self.data_dir / "shared"
-        
-        self.shared_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 初始化共享数据
-        self.shared_tasks_file = self.shared_dir / "all_tasks.json"
-        if not self.shared_tasks_file.exists():
-            self._save_json(self.shared_tasks_file, {})
-    
-    def _load_json(self, file_path: Path) -> dict:
-        """加载JSON文件"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-    
-    def _save_json(self, file_path: Path, data: dict):
-        """保存JSON文件"""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-    
+        self.store = _get_store(self.data_dir)
+
     def save_user_file(self, user_id: str, file_id: str, file_info: Dict):
         """保存用户上传的文件信息"""
-        user_dir = self.users_dir / user_id
-        user_dir.mkdir(parents=True, exist_ok=True)
-        
-        files_file = user_dir / "files.json"
-        files_data = self._load_json(files_file)
-        
-        files_data[file_id] = {
+        uploaded_at = datetime.now().isoformat()
+        record = {
             **file_info,
-            "uploaded_at": datetime.now().isoformat(),
+            "uploaded_at": uploaded_at,
             "user_id": user_id
         }
-        
-        self._save_json(files_file, files_data)
-    
+
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT INTO files (file_id, user_id, json_blob, uploaded_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(file_id) DO UPDATE SET user_id = excluded.user_id, json_blob = excluded.json_blob, "
+                "uploaded_at = excluded.uploaded_at",
+                (file_id, user_id, _dumps(record), uploaded_at)
+            )
+
     def get_user_files(self, user_id: str) -> Dict:
         """获取用户的文件列表"""
-        user_dir = self.users_dir / user_id
-        files_file = user_dir / "files.json"
-        return self._load_json(files_file)
-    
+        rows = self.store.query("SELECT file_id, json_blob FROM files WHERE user_id = ? ORDER BY rowid", (user_id,))
+        return {row["file_id"]: orjson.loads(row["json_blob"]) for row in rows}
+
     def delete_user_file(self, user_id: str, file_id: str):
         """删除用户文件"""
-        user_dir = self.users_dir / user_id
-        files_file = user_dir / "files.json"
-        files_data = self._load_json(files_file)
-        
-        if file_id in files_data:
-            del files_data[file_id]
-            self._save_json(files_file, files_data)
+        with self.store.transaction() as conn:
+            deleted = conn.execute("DELETE FROM files WHERE file_id = ? AND user_id = ?", (file_id, user_id)).rowcount
+
+        if deleted:
             logger.info(f"删除用户 {user_id} 的文件记录: {file_id}")
         else:
             logger.warning(f"文件 {file_id} 不存在于用户 {user_id} 的记录中")
-    
+
     def save_user_task(self, user_id: str, task_id: str, task_info: Dict):
-        """保存用户任务"""
-        user_dir = self.users_dir / user_id
-        user_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 保存到用户目录
-        tasks_file = user_dir / "tasks.json"
-        tasks_data = self._load_json(tasks_file)
-        tasks_data[task_id] = task_info
-        self._save_json(tasks_file, tasks_data)
-        
-        # 同时保存到共享目录（供所有用户查看）
-        shared_tasks = self._load_json(self.shared_tasks_file)
-        shared_tasks[task_id] = {
+        """保存用户任务（所有用户共享查看，按 user_id 区分归属）"""
+        task = {
             **task_info,
             "user_id": user_id,
             "created_at": task_info.get("created_at", datetime.now().isoformat())
         }
-        self._save_json(self.shared_tasks_file, shared_tasks)
-    
+
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT INTO tasks (task_id, user_id, json_blob, created_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(task_id) DO UPDATE SET user_id = excluded.user_id, json_blob = excluded.json_blob, "
+                "created_at = excluded.created_at, updated_at = excluded.updated_at",
+                (task_id, user_id, _dumps(task), task["created_at"], task.get("updated_at"))
+            )
+
     def get_user_tasks(self, user_id: str) -> Dict:
         """获取用户的任务列表"""
-        user_dir = self.users_dir / user_id
-        tasks_file = user_dir / "tasks.json"
-        return self._load_json(tasks_file)
-    
+        rows = self.store.query("SELECT task_id, json_blob FROM tasks WHERE user_id = ? ORDER BY rowid", (user_id,))
+        return {row["task_id"]: orjson.loads(row["json_blob"]) for row in rows}
+
     def get_all_tasks(self) -> Dict:
         """获取所有用户的任务（共享数据）"""
-        return self._load_json(self.shared_tasks_file)
-    
+        rows = self.store.query("SELECT task_id, json_blob FROM tasks ORDER BY rowid")
+        return {row["task_id"]: orjson.loads(row["json_blob"]) for row in rows}
+
     def update_task(self, user_id: str, task_id: str, updates: Dict):
         """更新任务状态"""
-        # 更新用户目录中的任务
-        user_dir = self.users_dir / user_id
-        tasks_file = user_dir / "tasks.json"
-        tasks_data = self._load_json(tasks_file)
-        
-        if task_id in tasks_data:
-            tasks_data[task_id].update(updates)
-            tasks_data[task_id]["updated_at"] = datetime.now().isoformat()
-            self._save_json(tasks_file, tasks_data)
-        
-        # 更新共享目录中的任务
-        shared_tasks = self._load_json(self.shared_tasks_file)
-        if task_id in shared_tasks:
-            shared_tasks[task_id].update(updates)
-            shared_tasks[task_id]["updated_at"] = datetime.now().isoformat()
-            self._save_json(self.shared_tasks_file, shared_tasks)
-    
+        with self.store.transaction() as conn:
+            row = conn.execute("SELECT json_blob FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if row is None:
+                return
+
+            task = orjson.loads(row["json_blob"])
+            task.update(updates)
+            task["updated_at"] = datetime.now().isoformat()
+            conn.execute(
+                "UPDATE tasks SET json_blob = ?, updated_at = ? WHERE task_id = ?",
+                (_dumps(task), task["updated_at"], task_id)
+            )
+
     def get_task(self, task_id: str) -> Optional[Dict]:
         """获取任务详情（从共享数据中）"""
-        shared_tasks = self._load_json(self.shared_tasks_file)
-        return shared_tasks.get(task_id)
-    
+        row = self.store.query_one("SELECT json_blob FROM tasks WHERE task_id = ?", (task_id,))
+        return orjson.loads(row["json_blob"]) if row is not None else None
+
     def update_task_by_id(self, task_id: str, updates: Dict):
         """通过任务ID更新任务（自动查找对应用户）"""
-        shared_tasks = self._load_json(self.shared_tasks_file)
-        if task_id not in shared_tasks:
+        row = self.store.query_one("SELECT user_id FROM tasks WHERE task_id = ?", (task_id,))
+        if row is None:
             logger.warning(f"任务 {task_id} 在共享数据中不存在")
             return
-        
-        task = shared_tasks[task_id]
-        user_id = task.get("user_id")
-        
-        if user_id:
-            # 使用现有的update_task方法
-            self.update_task(user_id, task_id, updates)
-        else:
-            # 如果没有user_id，直接更新共享数据
-            shared_tasks[task_id].update(updates)
-            shared_tasks[task_id]["updated_at"] = datetime.now().isoformat()
-            self._save_json(self.shared_tasks_file, shared_tasks)
-    
+
+        self.update_task(row["user_id"], task_id, updates)
+
     def delete_task(self, user_id: str, task_id: str):
         """删除任务（仅创建者可删除）"""
-        # 从用户目录删除
-        user_dir = self.users_dir / user_id
-        tasks_file = user_dir / "tasks.json"
-        tasks_data = self._load_json(tasks_file)
-        
-        if task_id in tasks_data:
-            del tasks_data[task_id]
-            self._save_json(tasks_file, tasks_data)
-        
-        # 从共享目录删除（检查权限）
-        shared_tasks = self._load_json(self.shared_tasks_file)
-        if task_id in shared_tasks and shared_tasks[task_id]["user_id"] == user_id:
-            del shared_tasks[task_id]
-            self._save_json(self.shared_tasks_file, shared_tasks)
+        with self.store.transaction() as conn:
+            conn.execute("DELETE FROM tasks WHERE task_id = ? AND user_id = ?", (task_id, user_id))
@@ -5,29 +5,65 @@
 """
 
 import asyncio
-import json
 import os
-import tempfile
 import uuid
 import csv
+import functools
+import io
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
+from urllib.parse import quote
 import shutil
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
 
-from fastapi import FastAPI, File, HTTPException, UploadFile, BackgroundTasks, Depends, Header
+import aiofiles
+import orjson
+import yaml
+from cachetools import TTLCache
+
+from fastapi import FastAPI, File, HTTPException, UploadFile, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
 # 导入现有的模块
 from benchmarks.InteractComp import InteractCompBenchmark
-from workflow.InteractComp import InteractCompAgent
+from workflow.InteractComp import create_multi_model_agent_factory
+from utils.async_llm import close_shared_http_client
 from utils.logs import logger
 from utils.user_manager import UserManager, UserDataManager
 
-app = FastAPI(title="InteractComp多用户标注质量测试API", version="3.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时清理过期会话、预加载配置并启动后台任务；关闭时停止后台任务、写入未落盘的任务更新并关闭LLM连接池"""
+    # asyncio.to_thread 使用的默认线程池，按CPU核数确定大小
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 2), thread_name_prefix="io")
+    )
+    # 开始接受请求前先清掉积累的过期会话，并在线程中预先解析好配置文件
+    await asyncio.to_thread(user_manager.cleanup_expired_sessions)
+    try:
+        await asyncio.to_thread(get_config)
+    except FileNotFoundError:
+        logger.warning("未找到config2.yaml配置文件，将在首次使用时重试加载")
+    session_cleanup_task = asyncio.create_task(cleanup_sessions_periodically())
+    try:
+        yield
+    finally:
+        session_cleanup_task.cancel()
+        await task_updates.flush()
+        await close_shared_http_client()
+
+app = FastAPI(
+    title="InteractComp多用户标注质量测试API",
+    version="3.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 # CORS配置
 app.add_middleware(
@@ -44,66 +80,233 @@ EVALUATION_MODELS = [
     "gpt-5", 
     "claude-4-sonnet"
 ]
+REQUIRED_MODELS = frozenset(EVALUATION_MODELS)
+
+# 评分结果持久化缓存的SQLite路径，可通过环境变量 GRADER_CACHE_PATH 设置，未设置时不启用
+GRADER_CACHE_PATH = os.environ.get("GRADER_CACHE_PATH") or None
+
+# 上传文件流式写入、拷贝的分块大小
+UPLOAD_CHUNK_SIZE = 1 << 20
+COPY_CHUNK_SIZE = 1 << 20
+# Starlette 解析表单时上传文件超过该大小(MultiPartParser.spool_max_size)会落盘到临时文件
+UPLOAD_SPOOL_MAX_SIZE = 1024 * 1024
+
+# 上传文件的存放目录，导入时创建一次
+TEMP_UPLOAD_DIR = Path("temp_uploads")
+TEMP_UPLOAD_DIR.mkdir(exist_ok=True)
 
-# 初始化用户管理器
+# 当前时间的ISO字符串缓存（秒级精度）：[整秒时间戳, 格式化结果]
+_now_iso_cache = [0, ""]
+
+def now_iso() -> str:
+    """当前时间的ISO字符串，同一秒内复用已格式化的结果"""
+    now = int(time.time())
+    if now != _now_iso_cache[0]:
+        _now_iso_cache[1] = datetime.fromtimestamp(now).isoformat(timespec='seconds')
+        _now_iso_cache[0] = now
+    return _now_iso_cache[1]
+
+# 初始化用户管理器（导入时即打开共享的SQLite存储，早于服务开始接受请求）
 user_manager = UserManager()
 user_data_manager = UserDataManager()
 
+# 同时执行的评估任务上限，超出的任务排队等待
+MAX_CONCURRENT_EVALUATIONS = 5
+
 # 并发任务管理器
 class TaskManager:
-    def __init__(self):
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_EVALUATIONS):
         self.running_tasks: Dict[str, asyncio.Task] = {}
-        self.executor = ThreadPoolExecutor(max_workers=15)  # 最多5个并发评估任务
+        self.file_usage: Dict[str, set] = {}  # file_id -> 正在使用该文件的任务ID
+        self.max_concurrent = max_concurrent
+        self.active_count = 0
+        self._slots: Optional[asyncio.Semaphore] = None  # 在事件循环中首次启动任务时创建
     
-    def start_task(self, task_id: str, coro):
-        """启动新的异步任务"""
+    def start_task(self, task_id: str, coro, file_ids: List[str] = ()):
+        """启动新的异步任务，file_ids 为任务读取的上传文件"""
         if task_id in self.running_tasks:
-            logger.warning(f"任务 {task_id} 已在运行中")
+            logger.warning("任务 %s 已在运行中", task_id)
             return
         
-        # 包装协程，增加异常处理
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        slots = self._slots
+        
+        # 包装协程，增加并发限制和异常处理
         async def wrapped_coro():
             try:
-                await coro
-                logger.info(f"任务 {task_id} 成功完成")
+                if slots.locked():
+                    await asyncio.to_thread(user_data_manager.update_task_by_id, task_id, {"status": "queued"})
+                    task_updates.notify(task_id)
+                    logger.info("任务 %s 排队等待空闲评估槽位", task_id)
+                async with slots:
+                    self.active_count += 1
+                    try:
+                        await coro
+                    finally:
+                        self.active_count -= 1
+                logger.info("任务 %s 成功完成", task_id)
             except Exception as e:
-                logger.error(f"任务 {task_id} 执行失败: {e}")
+                logger.error("任务 %s 执行失败: %s", task_id, e)
                 # 更新任务状态为失败
                 try:
-                    user_data_manager.update_task_by_id(task_id, {
+                    await task_updates.finish_task(task_id)
+                    await asyncio.to_thread(user_data_manager.update_task_by_id, task_id, {
                         "status": "failed",
                         "error": str(e),
-                        "completed_at": datetime.now().isoformat()
+                        "completed_at": now_iso()
                     })
+                    task_updates.notify(task_id)
                 except Exception as update_error:
-                    logger.error(f"更新任务状态失败 {task_id}: {update_error}")
+                    logger.error("更新任务状态失败 %s: %s", task_id, update_error)
         
         task = asyncio.create_task(wrapped_coro())
         self.running_tasks[task_id] = task
+        for file_id in file_ids:
+            self.file_usage.setdefault(file_id, set()).add(task_id)
         
         # 任务完成后自动清理
         def cleanup(future):
-            if task_id in self.running_tasks:
-                del self.running_tasks[task_id]
-                logger.debug(f"任务 {task_id} 已清理，剩余运行任务数: {len(self.running_tasks)}")
+            for file_id in file_ids:
+                users = self.file_usage.get(file_id)
+                if users is not None:
+                    users.discard(task_id)
+                    if not users:
+                        del self.file_usage[file_id]
+            # running_tasks 同时是任务的强引用（事件循环只弱引用任务），只能在完成后移除
+            if self.running_tasks.pop(task_id, None) is not None:
+                logger.debug("任务 %s 已清理，剩余运行任务数: %s", task_id, len(self.running_tasks))
         
         task.add_done_callback(cleanup)
-        logger.info(f"任务 {task_id} 已启动，当前运行任务数: {len(self.running_tasks)}")
+        logger.info("任务 %s 已启动，当前运行任务数: %s", task_id, len(self.running_tasks))
     
     def is_task_running(self, task_id: str) -> bool:
         """检查任务是否正在运行"""
         return task_id in self.running_tasks
     
     def get_running_task_count(self) -> int:
-        """获取当前运行任务数量"""
+        """获取当前运行任务数量（含排队中的任务）"""
         return len(self.running_tasks)
     
+    def get_available_slots(self) -> int:
+        """获取空闲的评估槽位数"""
+        return max(0, self.max_concurrent - self.active_count)
+    
+    def is_file_in_use(self, file_id: str) -> bool:
+        """文件是否正被运行中（或排队中）的任务使用"""
+        return file_id in self.file_usage
+    
     def get_running_task_ids(self) -> List[str]:
         """获取正在运行的任务ID列表"""
         return list(self.running_tasks.keys())
 
+# 任务进度写入合并器
+class TaskUpdateCoalescer:
+    """合并同一任务的进度更新：每个任务最多每 min_interval 秒写一次数据库，写入后唤醒等待该任务的请求"""
+
+    def __init__(self, delay: float = 0.05, min_interval: float = 2.0):
+        self.delay = delay
+        self.min_interval = min_interval
+        self.pending: Dict[str, tuple] = {}  # task_id -> (user_id, 合并后的更新, 定时写入句柄)
+        self.last_flush: Dict[str, float] = {}  # task_id -> 上次写入的 loop.time()
+        self.waiters: Dict[str, asyncio.Event] = {}  # task_id -> 下次写入时置位的事件
+        self._flushes = set()  # 定时触发、尚未完成的写入
+        self._write_lock: Optional[asyncio.Lock] = None  # 在事件循环中首次写入时创建
+
+    def update(self, user_id: str, task_id: str, updates: Dict):
+        """记录一次进度更新，稍后与期间的其他更新合并写入"""
+        entry = self.pending.get(task_id)
+        if entry is not None:
+            entry[1].update(updates)
+            return
+        loop = asyncio.get_running_loop()
+        # 距上次写入不足 min_interval 时推迟，期间的更新都合并进这一次写入
+        due = max(loop.time() + self.delay, self.last_flush.get(task_id, 0.0) + self.min_interval)
+        handle = loop.call_at(due, self._flush_scheduled, task_id)
+        self.pending[task_id] = (user_id, dict(updates), handle)
+
+    async def complete(self, user_id: str, task_id: str, updates: Dict):
+        """写入任务的最终状态（连同之前未写入的更新），之后不会再有进度更新"""
+        entry = self.pending.get(task_id)
+        if entry is None:
+            self.pending[task_id] = (user_id, dict(updates), None)
+        else:
+            entry[1].update(updates)
+        await self.finish_task(task_id)
+
+    def _flush_scheduled(self, task_id: str):
+        flush = asyncio.create_task(self._flush_logged(task_id))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def _flush_logged(self, task_id: str):
+        try:
+            await self.flush_task(task_id)
+        except Exception as e:
+            logger.error("写入任务更新失败 %s: %s", task_id, e)
+
+    async def flush_task(self, task_id: str):
+        """立即写入某个任务尚未落盘的更新"""
+        entry = self.pending.pop(task_id, None)
+        if entry is None:
+            return
+        user_id, merged, handle = entry
+        if handle is not None:
+            handle.cancel()
+        self.last_flush[task_id] = asyncio.get_running_loop().time()
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        # 写入在线程池中执行；加锁保证按取出顺序落盘，较早的进度不会覆盖最终状态
+        async with self._write_lock:
+            await asyncio.to_thread(user_data_manager.update_task, user_id, task_id, merged)
+        self.notify(task_id)
+
+    def watch(self, task_id: str) -> asyncio.Event:
+        """获取在该任务下次写入后置位的事件（需在读取任务之前调用，避免漏掉更新）"""
+        event = self.waiters.get(task_id)
+        if event is None:
+            event = self.waiters[task_id] = asyncio.Event()
+        return event
+
+    def unwatch(self, task_id: str):
+        """任务已结束或不存在，不会再有写入，丢弃等待事件"""
+        self.waiters.pop(task_id, None)
+
+    def notify(self, task_id: str):
+        """任务数据已写入数据库，唤醒所有等待该任务的请求"""
+        event = self.waiters.pop(task_id, None)
+        if event is not None:
+            event.set()
+
+    async def finish_task(self, task_id: str):
+        """任务结束：写入尚未落盘的更新，之后不会再有进度更新"""
+        await self.flush_task(task_id)
+        self.last_flush.pop(task_id, None)
+
+    async def flush(self):
+        """写入所有尚未落盘的更新，并等待已触发的写入完成"""
+        for task_id in list(self.pending):
+            await self._flush_logged(task_id)
+        if self._flushes:
+            await asyncio.gather(*self._flushes)
+
 # 创建全局任务管理器
 task_manager = TaskManager()
+task_updates = TaskUpdateCoalescer()
+
+
+# 过期会话的批量清理间隔（秒）；单个会话在校验时发现过期也会被删除
+SESSION_CLEANUP_INTERVAL = 600
+
+
+async def cleanup_sessions_periodically():
+    """后台定期批量删除过期会话"""
+    while True:
+        await asyncio.sleep(SESSION_CLEANUP_INTERVAL)
+        try:
+            await asyncio.to_thread(user_manager.cleanup_expired_sessions)
+        except Exception as e:
+            logger.error("清理过期会话失败: %s", e)
 
 # Pydantic模型
 class UserRegister(BaseModel):
@@ -118,6 +321,11 @@ class UserLogin(BaseModel):
 class TaskCreate(BaseModel):
     file_ids: List[str]
 
+# 已验证会话的短期缓存（token -> 用户信息），同一token在有效期内的重复请求不再查询存储；
+# 只在事件循环线程中访问，登出时主动移除
+SESSION_CACHE_TTL = 60
+session_cache: TTLCache = TTLCache(maxsize=10000, ttl=SESSION_CACHE_TTL)
+
 # 认证依赖
 async def get_current_user(authorization: Optional[str] = Header(None)):
     """获取当前用户"""
@@ -125,14 +333,19 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
         raise HTTPException(status_code=401, detail="未提供认证信息")
     
     token = authorization[7:]  # 移除 "Bearer "
-    user_id = user_manager.validate_session(token)
+    user_info = session_cache.get(token)
+    if user_info is not None:
+        return user_info
+    
+    user_id = await user_manager.validate_session_async(token)
     if not user_id:
         raise HTTPException(status_code=401, detail="认证失效，请重新登录")
     
-    user_info = user_manager.get_user_info(user_id)
+    user_info = await asyncio.to_thread(user_manager.get_user_info, user_id)
     if not user_info:
         raise HTTPException(status_code=401, detail="用户不存在")
     
+    session_cache[token] = user_info
     return user_info
 
 # 支持的搜索引擎配置（用于Google搜索）
@@ -145,24 +358,30 @@ def get_search_config():
         return {}
 
 # 配置读取函数
+# 配置文件的候选位置，按顺序查找
+CONFIG_PATHS = (Path("config/config2.yaml"), Path("config2.yaml"))
+# 有 libyaml 时使用C实现的安全加载器，否则回退到纯Python实现
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# 上次成功读取的配置文件路径及其修改时间，再次加载时优先使用
+_config_path: Optional[Path] = None
+_config_mtime: Optional[float] = None
+
 def load_config():
     """从config2.yaml加载配置"""
-    import yaml
-    from pathlib import Path
-    
-    config_paths = [
-        Path("config/config2.yaml"),
-        Path("config2.yaml"),
-        Path("./config/config2.yaml")
-    ]
+    global _config_path, _config_mtime
+    config_paths = CONFIG_PATHS if _config_path is None else (_config_path,) + CONFIG_PATHS
     
     for config_path in config_paths:
         if config_path.exists():
             try:
+                mtime = config_path.stat().st_mtime
                 with open(config_path, 'r', encoding='utf-8') as f:
-                    return yaml.safe_load(f)
+                    config = yaml.load(f, Loader=YAML_LOADER)
+                _config_path = config_path
+                _config_mtime = mtime
+                return config
             except Exception as e:
-                logger.error(f"读取配置文件失败: {e}")
+                logger.error("读取配置文件失败: %s", e)
                 continue
     
     raise FileNotFoundError("未找到config2.yaml配置文件")
@@ -170,13 +389,26 @@ def load_config():
 # 全局配置
 CONFIG = None
 
+def _config_changed() -> bool:
+    """已加载的配置文件是否被修改或删除"""
+    try:
+        return _config_path.stat().st_mtime != _config_mtime
+    except OSError:
+        return True
+
 def get_config():
-    """获取配置，如果未加载则加载"""
+    """获取配置，未加载或配置文件被修改时重新加载"""
     global CONFIG
-    if CONFIG is None:
+    if CONFIG is None or _config_changed():
         CONFIG = load_config()
     return CONFIG
 
+def reload_config():
+    """丢弃已缓存的配置并重新加载"""
+    global CONFIG
+    CONFIG = None
+    return get_config()
+
 @app.get("/")
 async def root():
     """根路径 - 检查服务状态"""
@@ -194,7 +426,7 @@ async def root():
 async def register_user(user_data: UserRegister):
     """用户注册"""
     try:
-        result = user_manager.register_user(
+        result = await user_manager.register_user_async(
             username=user_data.username,
             password=user_data.password,
             display_name=user_data.display_name
@@ -209,12 +441,12 @@ async def register_user(user_data: UserRegister):
 @app.post("/auth/login")
 async def login_user(user_data: UserLogin):
     """用户登录"""
-    user_info = user_manager.authenticate_user(user_data.username, user_data.password)
+    user_info = await user_manager.authenticate_user_async(user_data.username, user_data.password)
     if not user_info:
         raise HTTPException(status_code=401, detail="用户名或密码错误")
     
     # 创建会话
-    session_token = user_manager.create_session(user_info["user_id"])
+    session_token = await asyncio.to_thread(user_manager.create_session, user_info["user_id"])
     
     return {
         "message": "登录成功",
@@ -230,14 +462,17 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
 @app.post("/auth/logout")
 async def logout_user(authorization: Optional[str] = Header(None)):
     """用户登出（清理会话）"""
-    # 这里可以添加会话清理逻辑
+    if authorization and authorization.startswith("Bearer "):
+        token = authorization[7:]
+        session_cache.pop(token, None)
+        await asyncio.to_thread(user_manager.delete_session, token)
     return {"message": "登出成功"}
 
 # 用户管理接口
 @app.get("/users")
 async def list_users(current_user: dict = Depends(get_current_user)):
     """获取所有用户列表"""
-    users = user_manager.list_all_users()
+    users = await asyncio.to_thread(user_manager.list_all_users)
     return {
         "users": users,
         "total": len(users)
@@ -250,39 +485,51 @@ async def upload_file(file: UploadFile = File(...), current_user: dict = Depends
         raise HTTPException(status_code=400, detail="只支持.jsonl或.json文件")
     
     file_id = str(uuid.uuid4())
-    temp_dir = Path("temp_uploads")
-    temp_dir.mkdir(exist_ok=True)
-    
-    file_path = temp_dir / f"{file_id}_{file.filename}"
-    
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    file_path = TEMP_UPLOAD_DIR / f"{file_id}_{file.filename}"
+    
+    if file.size is not None and file.size > UPLOAD_SPOOL_MAX_SIZE:
+        # 较大的上传已被 Starlette 落盘到临时文件，直接在内核中拷贝
+        size = await asyncio.to_thread(_copy_upload_to_path, file.file, file_path)
+    else:
+        # 分块流式写入磁盘，不把整个上传文件读进内存
+        size = 0
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                await buffer.write(chunk)
     
     # 保存文件信息到用户数据
     file_info = {
         "file_id": file_id,
         "filename": file.filename,
-        "size": len(content),
+        "size": size,
         "file_path": str(file_path),
         "status": "uploaded"
     }
     
-    user_data_manager.save_user_file(current_user["user_id"], file_id, file_info)
+    await asyncio.to_thread(user_data_manager.save_user_file, current_user["user_id"], file_id, file_info)
     
-    logger.info(f"用户 {current_user['username']} 上传文件: {file.filename}, ID: {file_id}")
+    logger.info("用户 %s 上传文件: %s, ID: %s", current_user['username'], file.filename, file_id)
     
     return {
         "file_id": file_id,
         "filename": file.filename,
-        "size": len(content),
+        "size": size,
         "status": "uploaded"
     }
 
+def _copy_upload_to_path(spooled_file, file_path: Path) -> int:
+    """把已落盘的上传临时文件拷贝到目标路径，返回文件大小"""
+    spooled_file.flush()
+    spooled_file.seek(0)
+    with open(file_path, "wb") as dst:
+        _copy_file_contents(spooled_file, dst)
+    return os.fstat(spooled_file.fileno()).st_size
+
 @app.get("/files")
 async def get_user_files(current_user: dict = Depends(get_current_user)):
     """获取当前用户的文件列表"""
-    files = user_data_manager.get_user_files(current_user["user_id"])
+    files = await asyncio.to_thread(user_data_manager.get_user_files, current_user["user_id"])
     return {
         "files": list(files.values()),
         "total": len(files)
@@ -293,37 +540,37 @@ async def delete_user_file(file_id: str, current_user: dict = Depends(get_curren
     """删除用户文件"""
     try:
         # 检查文件是否属于当前用户
-        user_files = user_data_manager.get_user_files(current_user["user_id"])
+        user_files = await asyncio.to_thread(user_data_manager.get_user_files, current_user["user_id"])
         if file_id not in user_files:
             raise HTTPException(status_code=404, detail="文件不存在或无权限")
         
         # 检查文件是否正在被任务使用
-        user_tasks = user_data_manager.get_user_tasks(current_user["user_id"])
-        for task_id, task in user_tasks.items():
-            if task.get('status') == 'running' and file_id in task.get('file_ids', []):
-                raise HTTPException(status_code=400, detail="文件正在被运行中的任务使用，无法删除")
+        if task_manager.is_file_in_use(file_id):
+            raise HTTPException(status_code=400, detail="文件正在被运行中的任务使用，无法删除")
         
         file_info = user_files[file_id]
-        file_path = file_info.get('file_path')
-        
-        # 删除物理文件
-        if file_path and os.path.exists(file_path):
-            os.remove(file_path)
-            logger.info(f"删除物理文件: {file_path}")
-        
-        # 从用户数据中删除文件记录
-        user_data_manager.delete_user_file(current_user["user_id"], file_id)
+        await asyncio.to_thread(_delete_user_file_sync, current_user["user_id"], file_id, file_info.get('file_path'))
         
-        logger.info(f"用户 {current_user['username']} 删除文件: {file_id}")
+        logger.info("用户 %s 删除文件: %s", current_user['username'], file_id)
         
         return {"success": True, "message": "文件删除成功"}
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"删除文件失败: {file_id}, 错误: {e}")
+        logger.error("删除文件失败: %s, 错误: %s", file_id, e)
         raise HTTPException(status_code=500, detail=f"删除文件失败: {str(e)}")
 
+def _delete_user_file_sync(user_id: str, file_id: str, file_path: Optional[str]):
+    """删除物理文件及文件记录（在线程池中运行）"""
+    # 删除物理文件
+    if file_path and os.path.exists(file_path):
+        os.remove(file_path)
+        logger.info("删除物理文件: %s", file_path)
+    
+    # 从用户数据中删除文件记录
+    user_data_manager.delete_user_file(user_id, file_id)
+
 @app.post("/start_test")
 async def start_test(
     task_data: TaskCreate,
@@ -331,10 +578,10 @@ async def start_test(
 ):
     """开始三模型评估测试"""
     # 验证文件权限（检查文件是否属于当前用户）
-    user_files = user_data_manager.get_user_files(current_user["user_id"])
-    for file_id in task_data.file_ids:
-        if file_id not in user_files:
-            raise HTTPException(status_code=403, detail=f"文件 {file_id} 不属于当前用户")
+    user_files = await asyncio.to_thread(user_data_manager.get_user_files, current_user["user_id"])
+    missing = [file_id for file_id in task_data.file_ids if file_id not in user_files]
+    if missing:
+        raise HTTPException(status_code=403, detail=f"文件 {', '.join(missing)} 不属于当前用户")
     
     # 验证配置文件
     try:
@@ -350,7 +597,7 @@ async def start_test(
         "task_id": task_id,
         "status": "pending",
         "progress": 0,
-        "created_at": datetime.now().isoformat(),
+        "created_at": now_iso(),
         "file_ids": task_data.file_ids,
         "evaluation_models": EVALUATION_MODELS,
         "user_id": current_user["user_id"],
@@ -359,13 +606,13 @@ async def start_test(
     }
     
     # 保存任务到用户数据
-    user_data_manager.save_user_task(current_user["user_id"], task_id, task_info)
+    await asyncio.to_thread(user_data_manager.save_user_task, current_user["user_id"], task_id, task_info)
     
     # 使用任务管理器启动并发任务
     evaluation_coro = run_multi_model_evaluation(task_id, task_data.file_ids, current_user["user_id"])
-    task_manager.start_task(task_id, evaluation_coro)
+    task_manager.start_task(task_id, evaluation_coro, task_data.file_ids)
     
-    logger.info(f"用户 {current_user['username']} 启动三模型评估任务: {task_id}，当前运行任务数: {task_manager.get_running_task_count()}")
+    logger.info("用户 %s 启动三模型评估任务: %s，当前运行任务数: %s", current_user['username'], task_id, task_manager.get_running_task_count())
     
     return {"task_id": task_id, "status": "started", "models": EVALUATION_MODELS}
 
@@ -373,30 +620,46 @@ async def start_test(
 async def get_system_status():
     """获取系统状态"""
     return {
-        "running_tasks": task_manager.get_running_task_count(),
+        "running_tasks": task_manager.active_count,
+        "queued_tasks": task_manager.get_running_task_count() - task_manager.active_count,
         "running_task_ids": task_manager.get_running_task_ids(),
-        "max_concurrent_tasks": 5,
-        "system_time": datetime.now().isoformat(),
-        "available_slots": max(0, 5 - task_manager.get_running_task_count())
+        "max_concurrent_tasks": task_manager.max_concurrent,
+        "system_time": now_iso(),
+        "available_slots": task_manager.get_available_slots()
     }
 
+# 长轮询 /test/{task_id}?wait=秒数 的最长等待时间（秒）
+MAX_STATUS_WAIT = 30.0
+FINISHED_STATUSES = frozenset(("completed", "failed"))
+
 @app.get("/test/{task_id}")
-async def get_test_status(task_id: str, current_user: dict = Depends(get_current_user)):
-    """获取测试状态"""
+async def get_test_status(task_id: str, wait: float = 0, current_user: dict = Depends(get_current_user)):
+    """获取测试状态；wait>0 时若任务未结束，最多等待 wait 秒直到任务有新的进度再返回"""
+    changed = task_updates.watch(task_id) if wait > 0 else None
     # 从共享数据中获取任务（所有用户都可以查看）
-    task = user_data_manager.get_task(task_id)
+    task = await asyncio.to_thread(user_data_manager.get_task, task_id)
+    if changed is not None and (not task or task.get("status") in FINISHED_STATUSES):
+        task_updates.unwatch(task_id)
+        changed = None
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
     
+    if changed is not None:
+        try:
+            await asyncio.wait_for(changed.wait(), timeout=min(wait, MAX_STATUS_WAIT))
+        except asyncio.TimeoutError:
+            return task
+        task = await asyncio.to_thread(user_data_manager.get_task, task_id)
+    
     return task
 
 @app.get("/tasks")
 async def get_tasks(current_user: dict = Depends(get_current_user)):
     """获取任务列表"""
     # 用户自己的任务
-    user_tasks = user_data_manager.get_user_tasks(current_user["user_id"])
+    user_tasks = await asyncio.to_thread(user_data_manager.get_user_tasks, current_user["user_id"])
     # 所有用户的任务（共享查看）
-    all_tasks = user_data_manager.get_all_tasks()
+    all_tasks = await asyncio.to_thread(user_data_manager.get_all_tasks)
     
     return {
         "user_tasks": list(user_tasks.values()),
@@ -409,18 +672,63 @@ async def get_tasks(current_user: dict = Depends(get_current_user)):
 async def download_csv_report(task_id: str, current_user: dict = Depends(get_current_user)):
     """下载CSV格式的测试报告"""
     # 从共享数据中获取任务（所有用户都可以下载）
-    task = user_data_manager.get_task(task_id)
+    task = await asyncio.to_thread(user_data_manager.get_task, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
     
     if task["status"] != "completed":
         raise HTTPException(status_code=400, detail="任务未完成，无法下载报告")
     
-    # 创建详细的CSV报告
-    import tempfile
-    temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, encoding='utf-8')
-    
-    writer = csv.writer(temp_file)
+    task_creator = task.get('display_name', task.get('username', '未知用户'))
+    filename = f"三模型评估报告_{task_creator}_{task_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    headers = {"Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}"}
+    
+    # 已完成任务的报告不会再变化，重复下载直接返回缓存的内容
+    with csv_report_lock:
+        content = csv_report_cache.get(task_id)
+    if content is not None:
+        return Response(content, media_type='text/csv', headers=headers)
+    
+    # 边生成边发送，不再先写临时文件；同步生成器由 Starlette 在线程池中迭代
+    return StreamingResponse(
+        _iter_and_cache_csv_report(task_id, task),
+        media_type='text/csv',
+        headers=headers
+    )
+
+# CSV 报告每积累这么多字节发送一次
+CSV_STREAM_CHUNK_SIZE = 1 << 16
+
+# CSV 报告中各模型列的顺序（与标题行一致）
+CSV_REPORT_MODELS = ("gpt-5-mini", "gpt-5", "claude-4-sonnet")
+CSV_ROWS_PER_BATCH = 256
+_EMPTY_RESULT: Dict = {}
+
+# 已生成的CSV报告缓存：task_id -> 报告内容；生成器在线程池中写入，需加锁
+CSV_REPORT_CACHE_SIZE = 32
+CSV_REPORT_CACHE_TTL = 600
+csv_report_cache: TTLCache = TTLCache(maxsize=CSV_REPORT_CACHE_SIZE, ttl=CSV_REPORT_CACHE_TTL)
+csv_report_lock = threading.Lock()
+
+def _csv_report_row(item: Dict, created_by: str, created_at: str) -> list:
+    """单条详细结果对应的CSV行"""
+    model_results = item.get("model_results") or _EMPTY_RESULT
+    row = [item.get("question", ""), item.get("correct_answer", "")]
+    for model in CSV_REPORT_MODELS:
+        result = model_results.get(model) or _EMPTY_RESULT
+        row.append(result.get("answer", ""))
+        row.append(result.get("correct", False))
+    row.append(item.get("correct_models_count", 0))
+    row.append(item.get("quality_failed", False))
+    row.append(item.get("total_cost", 0.0))
+    row.append(created_by)
+    row.append(created_at)
+    return row
+
+def _iter_csv_report(task: Dict):
+    """逐块生成任务详细结果的CSV内容（UTF-8 字节）"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
     # CSV标题
     writer.writerow([
         'question', 'correct_answer', 
@@ -431,50 +739,57 @@ async def download_csv_report(task_id: str, current_user: dict = Depends(get_cur
         'created_by', 'created_at'
     ])
     
-    # 写入数据
-    for item in task.get("detailed_results", []):
-        writer.writerow([
-            item.get("question", ""),
-            item.get("correct_answer", ""),
-            item.get("model_results", {}).get("gpt-5-mini", {}).get("answer", ""),           
-            item.get("model_results", {}).get("gpt-5-mini", {}).get("correct", False),       
-            item.get("model_results", {}).get("gpt-5", {}).get("answer", ""),               
-            item.get("model_results", {}).get("gpt-5", {}).get("correct", False),           
-            item.get("model_results", {}).get("claude-4-sonnet", {}).get("answer", ""),     
-            item.get("model_results", {}).get("claude-4-sonnet", {}).get("correct", False), 
-            item.get("correct_models_count", 0),
-            item.get("quality_failed", False),
-            item.get("total_cost", 0.0),
-            task.get('display_name', task.get('username', '未知用户')),
-            task.get('created_at', '')
-        ])
-    
-    temp_file.close()
-    
-    task_creator = task.get('display_name', task.get('username', '未知用户'))
-    return FileResponse(
-        path=temp_file.name,
-        filename=f"三模型评估报告_{task_creator}_{task_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        media_type='text/csv'
+    # 写入数据：每批若干行交给 writerows 在 C 层循环
+    created_by = task.get('display_name', task.get('username', '未知用户'))
+    created_at = task.get('created_at', '')
+    items = task.get("detailed_results", [])
+    for start in range(0, len(items), CSV_ROWS_PER_BATCH):
+        writer.writerows(
+            _csv_report_row(item, created_by, created_at)
+            for item in items[start:start + CSV_ROWS_PER_BATCH]
+        )
+        if buffer.tell() >= CSV_STREAM_CHUNK_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    
+    yield buffer.getvalue().encode('utf-8')
+
+def _iter_and_cache_csv_report(task_id: str, task: Dict):
+    """发送CSV报告的同时收集内容，完整发送后放入缓存（客户端中途断开则不缓存）"""
+    chunks = []
+    for chunk in _iter_csv_report(task):
+        chunks.append(chunk)
+        yield chunk
+    with csv_report_lock:
+        csv_report_cache[task_id] = b"".join(chunks)
+
+@functools.lru_cache(maxsize=8)
+def get_agent_factory(max_turns: int, search_engine_type: str, user_config: str):
+    """按参数缓存Agent工厂，各评估任务共享同一个实例"""
+    return create_multi_model_agent_factory(
+        max_turns=max_turns,
+        search_engine_type=search_engine_type,
+        user_config=user_config
     )
 
 async def run_multi_model_evaluation(task_id: str, file_ids: List[str], user_id: str):
     """运行三模型评估"""
-    task = user_data_manager.get_task(task_id)
+    task = await asyncio.to_thread(user_data_manager.get_task, task_id)
     if not task:
-        logger.error(f"任务不存在: {task_id}")
+        logger.error("任务不存在: %s", task_id)
         return
     
     try:
-        user_data_manager.update_task(user_id, task_id, {"status": "running", "progress": 10})
+        task_updates.update(user_id, task_id, {"status": "running", "progress": 10})
         
         # 1. 读取配置文件
         config = get_config()
-        user_data_manager.update_task(user_id, task_id, {"progress": 20})
+        task_updates.update(user_id, task_id, {"progress": 20})
         
-        # 2. 合并数据文件
-        combined_file_path = await merge_uploaded_files(file_ids, task_id, user_id)
-        user_data_manager.update_task(user_id, task_id, {"progress": 30})
+        # 2. 读取数据文件（直接在内存中交给评估器，不再写出合并文件再读回）
+        problems = await load_uploaded_problems(file_ids, user_id)
+        task_updates.update(user_id, task_id, {"progress": 30})
 
         # 3. 创建多模型评估器和Agent工厂
         log_path = f"workspace/multi_model_test_{task_id}/"
@@ -483,29 +798,30 @@ async def run_multi_model_evaluation(task_id: str, file_ids: List[str], user_id:
         # 使用修改后的InteractCompBenchmark，支持多模型评估
         benchmark = InteractCompBenchmark(
             name=f"MultiModelTest_{task_id}",
-            file_path=combined_file_path,
+            file_path=None,  # 题目数据直接传入 run_multi_model_evaluation
             log_path=log_path,
             grader_config="gpt-4o",
+            grader_cache_path=GRADER_CACHE_PATH,
             models=EVALUATION_MODELS  # 传入评估模型列表
         )
 
-        # 创建Agent工厂
-        from workflow.InteractComp import create_multi_model_agent_factory
-        agent_factory = create_multi_model_agent_factory(
+        # 获取（进程内复用的）Agent工厂
+        agent_factory = get_agent_factory(
             max_turns=5,  # 多模型评估时减少轮数节省成本
             search_engine_type="google",
             user_config="gpt-4o"
         )
-        user_data_manager.update_task(user_id, task_id, {"progress": 40})
+        task_updates.update(user_id, task_id, {"progress": 40})
         
         # 4. 执行多模型评估
-        logger.info(f"开始多模型评估: {task_id}")
+        logger.info("开始多模型评估: %s", task_id)
 
         results = await benchmark.run_multi_model_evaluation(
             agent_factory, 
-            max_concurrent_tasks=20
+            max_concurrent_tasks=20,
+            data=problems
         )
-        user_data_manager.update_task(user_id, task_id, {"progress": 90})
+        task_updates.update(user_id, task_id, {"progress": 90})
         
         # 5. 处理结果
         avg_quality_failed_rate = results["avg_quality_failed_rate"]
@@ -525,8 +841,8 @@ async def run_multi_model_evaluation(task_id: str, file_ids: List[str], user_id:
             "quality_failed_rate": avg_quality_failed_rate,  # 质量不合格率
             "total_cost": total_cost,
             "detailed_results": detailed_results,
-            "failed_items": [item for item in detailed_results if item["quality_failed"]],
-            "completed_at": datetime.now().isoformat(),
+            "failed_items": results["failed_items"],
+            "completed_at": now_iso(),
             "evaluation_summary": {
                 "models_used": EVALUATION_MODELS,
                 "evaluation_logic": "质量不合格 = 2个以上模型答对",
@@ -534,24 +850,33 @@ async def run_multi_model_evaluation(task_id: str, file_ids: List[str], user_id:
             }
         }
         
-        user_data_manager.update_task(user_id, task_id, final_update)
+        await task_updates.complete(user_id, task_id, final_update)
         
-        # 7. 清理临时文件
-        if os.path.exists(combined_file_path):
-            os.remove(combined_file_path)
-        
-        logger.info(f"三模型评估完成: {task_id}, 不合格率: {avg_quality_failed_rate:.3f}")
+        logger.info("三模型评估完成: %s, 不合格率: %.3f", task_id, avg_quality_failed_rate)
         
     except Exception as e:
         error_update = {
             "status": "failed",
             "error": str(e),
-            "completed_at": datetime.now().isoformat()
+            "completed_at": now_iso()
         }
         
-        user_data_manager.update_task(user_id, task_id, error_update)
+        await task_updates.complete(user_id, task_id, error_update)
             
-        logger.error(f"三模型评估失败: {task_id}, 错误: {e}")
+        logger.error("三模型评估失败: %s, 错误: %s", task_id, e)
+
+@app.post("/config/reload")
+async def reload_config_endpoint(current_user: dict = Depends(get_current_user)):
+    """重新加载配置文件"""
+    try:
+        await asyncio.to_thread(reload_config)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="未找到config2.yaml配置文件")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"配置文件错误: {str(e)}")
+    
+    logger.info("配置已由用户 %s 重新加载", current_user["username"])
+    return {"message": "配置已重新加载"}
 
 @app.get("/config/status")
 async def get_config_status():
@@ -560,20 +885,17 @@ async def get_config_status():
         config = get_config()
         models = config.get('models', {})
         
-        # 检查必需的模型配置
+        # 检查必需的模型配置（结果仍按 EVALUATION_MODELS 的顺序列出）
         required_models = EVALUATION_MODELS
-        missing_models = []
-        configured_models = []
-        
-        for model in required_models:
-            if model not in models:
-                missing_models.append(f"{model} (未配置)")
-            elif not models[model].get('api_key'):
-                missing_models.append(f"{model} (缺少API Key)")
-            else:
-                configured_models.append(model)
+        declared = REQUIRED_MODELS & models.keys()
+        ready = {model for model in declared if models[model].get('api_key')}
+        configured_models = [model for model in required_models if model in ready]
+        missing_models = [
+            f"{model} (缺少API Key)" if model in declared else f"{model} (未配置)"
+            for model in required_models if model not in ready
+        ]
         
-        logger.info(f"配置检查 - 已配置: {configured_models}, 缺失: {missing_models}")
+        logger.info("配置检查 - 已配置: %s, 缺失: %s", configured_models, missing_models)
         
         return {
             "config_found": True,
@@ -594,53 +916,69 @@ async def get_config_status():
             "suggestion": "请参考 config2.example.yaml 创建配置文件"
         }
     except Exception as e:
-        logger.error(f"配置检查失败: {e}")
+        logger.error("配置检查失败: %s", e)
         return {
             "config_found": False,
             "error": f"配置文件读取失败: {str(e)}",
             "ready": False
         }
 
-async def merge_uploaded_files(file_ids: List[str], task_id: str, user_id: str = None) -> str:
-    """合并上传的数据文件为单个JSONL文件"""
-    output_dir = Path("workspace") / task_id
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / f"temp_combined_{task_id}.jsonl"
-    
-    with open(output_path, 'w', encoding='utf-8') as out_f:
-        for file_id in file_ids:
-            # 从用户数据中获取文件路径
-            if user_id:
-                user_files = user_data_manager.get_user_files(user_id)
-                if file_id not in user_files:
-                    logger.warning(f"文件 {file_id} 不属于用户 {user_id}")
-                    continue
-                file_path = user_files[file_id]['file_path']
-            else:
-                # 回退到临时存储文件夹搜索
-                temp_dir = Path("temp_uploads")
-                file_path = None
-                for temp_file in temp_dir.glob(f"{file_id}_*"):
-                    file_path = str(temp_file)
+async def load_uploaded_problems(file_ids: List[str], user_id: str = None) -> List[dict]:
+    """读取并解析上传的数据文件，按 file_ids 顺序返回全部题目"""
+    # 先取好用户文件列表，工作线程里只做文件读取，不访问用户数据存储
+    user_files = await asyncio.to_thread(user_data_manager.get_user_files, user_id) if user_id else None
+    return await asyncio.to_thread(_load_uploaded_problems_sync, file_ids, user_id, user_files)
+
+def _copy_file_contents(in_f, out_f):
+    """把 in_f 的全部内容追加到 out_f：Linux 上用 sendfile 在内核中拷贝，否则按块拷贝"""
+    if hasattr(os, "sendfile"):
+        out_f.flush()
+        size = os.fstat(in_f.fileno()).st_size
+        offset = 0
+        try:
+            while offset < size:
+                sent = os.sendfile(out_f.fileno(), in_f.fileno(), offset, size - offset)
+                if sent == 0:
                     break
-                if not file_path:
-                    logger.error(f"找不到文件: {file_id}")
-                    continue
-            
-            with open(file_path, 'r', encoding='utf-8') as in_f:
-                if file_path.endswith('.jsonl'):
-                    for line in in_f:
-                        if line.strip():
-                            out_f.write(line)
-                else:  # .json
-                    data = json.load(in_f)
-                    if isinstance(data, list):
-                        for item in data:
-                            out_f.write(json.dumps(item, ensure_ascii=False) + '\n')
-                    else:
-                        out_f.write(json.dumps(data, ensure_ascii=False) + '\n')
-    
-    return str(output_path)
+                offset += sent
+            return
+        except OSError:
+            # 文件系统不支持时回退；已经拷贝的部分不再重复
+            in_f.seek(offset)
+    shutil.copyfileobj(in_f, out_f, COPY_CHUNK_SIZE)
+
+def _load_uploaded_problems_sync(file_ids: List[str], user_id: Optional[str], user_files: Optional[Dict]) -> List[dict]:
+    """同步读取并解析上传文件（在线程池中运行）"""
+    problems = []
+    for file_id in file_ids:
+        # 从用户数据中获取文件路径
+        if user_id:
+            if file_id not in user_files:
+                logger.warning("文件 %s 不属于用户 %s", file_id, user_id)
+                continue
+            file_path = user_files[file_id]['file_path']
+        else:
+            # 回退到临时存储文件夹搜索
+            file_path = None
+            for temp_file in TEMP_UPLOAD_DIR.glob(f"{file_id}_*"):
+                file_path = str(temp_file)
+                break
+            if not file_path:
+                logger.error("找不到文件: %s", file_id)
+                continue
+        
+        with open(file_path, 'rb') as in_f:
+            if file_path.endswith('.jsonl'):
+                # 跳过空行
+                problems.extend(orjson.loads(line) for line in in_f if line.strip())
+            else:  # .json
+                data = orjson.loads(in_f.read())
+                if isinstance(data, list):
+                    problems.extend(data)
+                else:
+                    problems.append(data)
+    
+    return problems
 
 if __name__ == "__main__":
     import uvicorn
@@ -670,4 +1008,9 @@ if __name__ == "__main__":
     print("🌐 API文档: http://localhost:8000/docs")
     print("📋 配置状态: http://localhost:8000/config/status")
     
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # 与 start_multiuser.py 一致：优先 uvloop + httptools，缺失时回退到纯 Python 实现
+    import importlib.util
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop=loop, http=http)
\ No newline at end of file
@@ -10,11 +10,16 @@ from typing import List, Tuple, Set, Dict, Any
 from workflow.base import Workflow
 from utils.async_llm import AsyncLLM
 from utils.formatter import XmlFormatter
-from workflow.search_engine import create_search_engine
+from workflow.search_engine import SearchEngine, LLMKnowledgeSearchEngine, create_search_engine
 from workflow.user_agent import UserAgent
 from workflow.prompt import BASE_PROMPT, FORCE_PROMPT
 from utils.logs import logger
 
+# 每轮决策都要解析模型输出，正则在模块加载时编译一次
+_FENCE_PATTERN = re.compile(r"```(?:\w+)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_THOUGHT_PATTERN = re.compile(r"<\s*thought\s*>(.*?)</\s*thought\s*>", re.IGNORECASE | re.DOTALL)
+_ACTION_PATTERN = re.compile(r"<\s*action\s*>(.*?)</\s*action\s*>", re.IGNORECASE | re.DOTALL)
+
 class InteractCompAgent(Workflow):
 
     def __init__(
@@ -25,13 +30,15 @@ class InteractCompAgent(Workflow):
         prompt: str,
         max_turns: int = 5,
         search_engine_type: str = "google",
-        user_config: str = "gpt-4o"
+        user_config: str = "gpt-4o",
+        search_engine: SearchEngine = None
     ):
         super().__init__(name, llm_config, dataset)
         self.max_turns = max_turns
         self.base_prompt = BASE_PROMPT
 
-        self.search_engine = create_search_engine(search_engine_type, llm_config=llm_config)
+        # 可传入共享的搜索引擎实例，避免每个agent重新读取配置创建
+        self.search_engine = search_engine or create_search_engine(search_engine_type, llm_config=llm_config)
         self.user_agent = UserAgent(llm_config=user_config)
 
         logger.info(
@@ -212,12 +219,12 @@ class InteractCompAgent(Workflow):
             return {"thought": "no_response", "action": "no_response"}
 
         text = str(response).strip()
-        fence = re.search(r"```(?:\w+)?\s*(.*?)```", text, flags=re.DOTALL | re.IGNORECASE)
+        fence = _FENCE_PATTERN.search(text)
         if fence:
             text = fence.group(1).strip()
 
-        thought_m = re.search(r"<\s*thought\s*>(.*?)</\s*thought\s*>", text, flags=re.IGNORECASE | re.DOTALL)
-        action_m = re.search(r"<\s*action\s*>(.*?)</\s*action\s*>", text, flags=re.IGNORECASE | re.DOTALL)
+        thought_m = _THOUGHT_PATTERN.search(text)
+        action_m = _ACTION_PATTERN.search(text)
 
         if not thought_m or not action_m:
             return {"thought": "can not find formatted thought, i need to use <thought></thought>", "action": "can not find formatted action, i need to use <action></action>"}
@@ -249,6 +256,8 @@ class InteractCompAgentFactory:
         self.max_turns = max_turns
         self.search_engine_type = search_engine_type
         self.user_config = user_config
+        # 不依赖模型的搜索引擎（google / wikipedia）在所有agent间共享
+        self._search_engine = None
         
         logger.info(f"InteractCompAgentFactory initialized with {max_turns} turns, search: {search_engine_type}")
     
@@ -271,12 +280,22 @@ class InteractCompAgentFactory:
             prompt=self.prompt,
             max_turns=self.max_turns,
             search_engine_type=self.search_engine_type,
-            user_config=self.user_config
+            user_config=self.user_config,
+            search_engine=self._get_search_engine(model_config)
         )
         
         logger.info(f"Created agent: {agent_name} with model: {model_config}")
         return agent
     
+    def _get_search_engine(self, model_config: str) -> SearchEngine:
+        """获取搜索引擎：无状态的引擎只创建一次，LLM知识检索绑定具体模型并累计用量，每个agent单独创建"""
+        if self._search_engine is not None:
+            return self._search_engine
+        engine = create_search_engine(self.search_engine_type, llm_config=model_config)
+        if not isinstance(engine, LLMKnowledgeSearchEngine):
+            self._search_engine = engine
+        return engine
+    
     def __call__(self, model_config: str) -> InteractCompAgent:
         """
         使工厂类可调用，方便作为agent_factory传递给benchmark
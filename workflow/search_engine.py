@@ -16,6 +16,8 @@ from utils.logs import logger
 from utils.async_llm import create_llm_instance
 from workflow.prompt import SEARCH_PROMPT
 
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 class SearchEngine(ABC):
     
     @classmethod
@@ -24,7 +26,7 @@ class SearchEngine(ABC):
         
         try:
             with open(config_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+                config = yaml.load(f, Loader=_YAML_LOADER)
             logger.info(f"Config loaded from: {config_path}")
             return config
         except Exception as e:
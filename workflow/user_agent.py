@@ -3,6 +3,9 @@ from typing import List, Tuple, Optional
 from utils.async_llm import AsyncLLM
 from utils.logs import logger
 
+# yes/no/idk 互不共享字符，一次扫描即可得到与逐个 `in` 判断相同的命中集合
+_ANSWER_PATTERN = re.compile(r"yes|no|idk")
+
 class UserAgent:
     def __init__(self, llm_config: str = "gpt-4o"):
         self.context = ""
@@ -58,14 +61,12 @@ Answer:"""
         return prompt
 
     def _parse_response(self, response: str) -> str:
-        response = response.strip().lower()
+        found = set(_ANSWER_PATTERN.findall(response.lower()))
         
-        if "yes" in response:
+        if "yes" in found:
             return "Yes"
-        elif "no" in response:
+        elif "no" in found:
             return "No"
-        elif "idk" in response:
-            return "idk"
         return "idk"
 
     def get_history(self) -> List[dict]: